@@ -1,31 +1,80 @@
+import gc
 import logging
 import time
-from abc import ABC, abstractmethod
-from enum import Enum
-from typing import Dict, Any, override
+from time import monotonic as _monotonic
+from enum import IntEnum
+from typing import Dict, Any, Protocol, Tuple, override
 
 import carla
 
 from vlib.core.sensors import V2XSensor
-from vlib.core.websocket_bridge import V2XWebSocketBridge
+from vlib.core.websocket_bridge import V2XWebSocketBridge, V2XWebSocketServer
 
 logger = logging.getLogger(__name__)
 
 
-class ChallengeStatus(Enum):
+class ChallengeStatus(IntEnum):
     """Status of a challenge"""
-    NOT_STARTED = "not_started"
-    RUNNING = "running"
-    COMPLETED = "completed"
-    FAILED = "failed"
+    NOT_STARTED = 0
+    RUNNING = 1
+    COMPLETED = 2
+    FAILED = 3
 
-class Challenge(ABC):
+
+# Serialized status names indexed by ChallengeStatus value, kept stable
+# for to_dict() consumers
+_STATUS_VALUES = ("not_started", "running", "completed", "failed")
+
+class ChallengeProtocol(Protocol):
+    """Structural type of a challenge, as used by the ChallengeEngine"""
+    challenge_id: str
+    name: str
+    status: ChallengeStatus
+    score: int
+    enable_websocket: bool
+    client: carla.Client | None
+    websocket_server: V2XWebSocketServer | None
+
+    def setup(self, world: carla.World, client: carla.Client) -> bool: ...
+
+    def check_completion(self) -> bool: ...
+
+    def start(self) -> bool: ...
+
+    def stop(self) -> bool: ...
+
+    def get_elapsed_time(self, now: float | None = None) -> float: ...
+
+    def to_dict(self) -> Dict[str, Any]: ...
+
+    def to_tuple(self) -> Tuple: ...
+
+
+class Challenge:
     """
     Base class for all CTF challenges.
 
-    This class provides the interface that all challenges must implement.
+    This class provides the interface that all challenges must implement:
+    subclasses override setup() and check_completion().
     """
 
+    # Pause between cleanup phases so in-flight sensor callbacks drain
+    # before their parent actors are destroyed (seconds)
+    CLEANUP_SETTLE_TIME: float = 0.02
+
+    # Field order of to_tuple()
+    TUPLE_FIELDS = ('challenge_id', 'name', 'description', 'status',
+                    'score', 'max_score', 'elapsed_time')
+
+    # Subclasses without their own __slots__ still get a __dict__ as usual
+    __slots__ = (
+        'challenge_id', 'name', 'description', 'enable_websocket',
+        'status', 'start_time', 'end_time', '_start_monotonic',
+        'score', 'max_score',
+        'world', 'client', 'spawned_actors', 'sensors',
+        'websocket_bridge', 'websocket_server', 'player_vehicle',
+    )
+
     def __init__(self, challenge_id: str, name: str, description: str, enable_websocket: bool = True):
         """
         Initialize a challenge.
@@ -44,19 +93,23 @@ class Challenge(ABC):
         self.status = ChallengeStatus.NOT_STARTED
         self.start_time: float = 0
         self.end_time: float = 0
+        self._start_monotonic: float | None = None
         self.score: int = 0
         self.max_score: int = 100
 
         self.world: carla.World | None = None
+        self.client: carla.Client | None = None
         self.spawned_actors: list[carla.Vehicle] = []
         self.sensors: list[V2XSensor] = []
         
         self.websocket_bridge: V2XWebSocketBridge | None = None
+        # Shared server provided by the ChallengeEngine; when unset the
+        # bridge runs its own server on port 4000
+        self.websocket_server: V2XWebSocketServer | None = None
         self.player_vehicle: carla.Vehicle | None = None
 
         logger.info(f"Challenge '{self.name}' ({self.challenge_id}) initialized (WebSocket: {enable_websocket})")
 
-    @abstractmethod
     def setup(self, world: carla.World, client: carla.Client) -> bool:
         """
         Set up the challenge in the CARLA world.
@@ -73,9 +126,8 @@ class Challenge(ABC):
             Make sure this is checked when passing the challenge to the 
             Challenge Engine
         """
-        pass
+        raise NotImplementedError(f"{type(self).__name__} must implement setup()")
 
-    @abstractmethod
     def check_completion(self) -> bool:
         """
         Check if the challenge has been completed.
@@ -86,7 +138,7 @@ class Challenge(ABC):
         Returns:
             bool: True if the challenge is complete, False otherwise
         """
-        pass
+        raise NotImplementedError(f"{type(self).__name__} must implement check_completion()")
 
     def start(self) -> bool:
         """
@@ -101,6 +153,7 @@ class Challenge(ABC):
 
         self.status = ChallengeStatus.RUNNING
         self.start_time = time.time()
+        self._start_monotonic = _monotonic()
         
         if self.enable_websocket:
             self._start_websocket_bridge()
@@ -124,18 +177,19 @@ class Challenge(ABC):
 
         try:
             for sensor in self.sensors:
-                if sensor is not None and hasattr(sensor, 'destroy'):
-                    try:
-                        sensor.destroy()
-                    except Exception as e:
-                        logger.error(f"Error destroying sensor: {e}")
+                if sensor is None:
+                    continue
+                try:
+                    sensor.destroy()
+                except Exception as e:
+                    logger.error(f"Error destroying sensor: {e}")
             self.sensors.clear()
             
             from vlib.core.sensors import v2x_sensors
+            actor_ids = {actor.id for actor in self.spawned_actors if actor is not None}
             sensors_to_remove = []
-            for sensor in v2x_sensors:
-                if (hasattr(sensor, 'attach_to') and sensor.attach_to and 
-                    sensor.attach_to in self.spawned_actors):
+            for sensor in tuple(v2x_sensors.values()):
+                if sensor.attach_to and sensor.attach_to.id in actor_ids:
                     sensors_to_remove.append(sensor)
             
             for sensor in sensors_to_remove:
@@ -143,14 +197,11 @@ class Challenge(ABC):
                     sensor.destroy()
                 except Exception as e:
                     logger.error(f"Error destroying V2X sensor {sensor.sensor_id}: {e}")
+            time.sleep(self.CLEANUP_SETTLE_TIME)
 
-            for actor in self.spawned_actors:
-                if actor is not None and actor.is_alive:
-                    try:
-                        actor.destroy()
-                    except Exception as e:
-                        logger.error(f"Error destroying actor {actor.id}: {e}")
+            self._destroy_spawned_actors()
             self.spawned_actors.clear()
+            gc.collect()
 
             logger.info(f"Challenge '{self.name}' stopped and cleaned up")
             return True
@@ -159,16 +210,40 @@ class Challenge(ABC):
             logger.error(f"Error during challenge cleanup: {e}")
             return False
 
-    def get_elapsed_time(self) -> float:
+    def _destroy_spawned_actors(self):
+        """Destroy all spawned actors, batched into one RPC when a client is available"""
+        actors = [actor for actor in self.spawned_actors if actor is not None and actor.is_alive]
+        if not actors:
+            return
+
+        if self.client is None:
+            for actor in actors:
+                try:
+                    actor.destroy()
+                except Exception as e:
+                    logger.error(f"Error destroying actor {actor.id}: {e}")
+            return
+
+        commands = [carla.command.DestroyActor(actor.id) for actor in actors]
+        for actor, response in zip(actors, self.client.apply_batch_sync(commands)):
+            if response.error:
+                logger.error(f"Error destroying actor {actor.id}: {response.error}")
+
+    def get_elapsed_time(self, now: float | None = None) -> float:
         """
         Get the elapsed time since the challenge started.
 
+        Args:
+            now: Current time.monotonic() value, if the caller already has one
+
         Returns:
             float: Elapsed time in seconds, or 0 if not started
         """
-        if self.start_time is None:
+        if self.status == ChallengeStatus.NOT_STARTED or self._start_monotonic is None:
             return 0.0
-        return time.time() - self.start_time
+        if now is None:
+            now = _monotonic()
+        return now - self._start_monotonic
 
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -181,19 +256,49 @@ class Challenge(ABC):
             'challenge_id': self.challenge_id,
             'name': self.name,
             'description': self.description,
-            'status': self.status.value,
+            'status': _STATUS_VALUES[self.status],
             'score': self.score,
             'max_score': self.max_score,
             'elapsed_time': self.get_elapsed_time()
         }
+
+    def to_tuple(self) -> Tuple:
+        """
+        Convert challenge information to a compact tuple.
+
+        Returns:
+            tuple: Challenge information ordered as TUPLE_FIELDS
+        """
+        return (
+            self.challenge_id,
+            self.name,
+            self.description,
+            _STATUS_VALUES[self.status],
+            self.score,
+            self.max_score,
+            self.get_elapsed_time()
+        )
     
     def _find_player_vehicle(self) -> carla.Vehicle | None:
         """
         Find the player vehicle (hero vehicle) in the world.
+
+        The player_vehicle found when the WebSocket bridge started is reused
+        while it is alive; the actors are only scanned again after that.
         
         Returns:
             carla.Vehicle: The player vehicle if found, None otherwise
         """
+        if self.player_vehicle is not None and self.player_vehicle.is_alive:
+            return self.player_vehicle
+
+        # Challenges usually deploy the hero themselves, so check the actors
+        # we spawned before falling back to a scan of the whole world
+        for actor in self.spawned_actors:
+            if (actor is not None and actor.is_alive
+                    and actor.attributes.get('role_name') == 'hero'):
+                return actor
+
         if not self.world:
             logger.debug("World not available, cannot find player vehicle")
             return None
@@ -229,12 +334,18 @@ class Challenge(ABC):
             self.websocket_bridge = V2XWebSocketBridge(
                 player_vehicle=self.player_vehicle,
                 world=self.world,
-                port=4000
+                port=4000,
+                challenge_id=self.challenge_id
             )
             
-            # Start server in background thread
-            self.websocket_bridge.start_server_thread()
-            logger.info(f"WebSocket bridge started for challenge '{self.name}' on port 4000")
+            if self.websocket_server:
+                # Route clients through the engine's shared server
+                self.websocket_server.register_bridge(self.websocket_bridge)
+                logger.info(f"WebSocket bridge started for challenge '{self.name}' on shared server")
+            else:
+                # Start server in background thread
+                self.websocket_bridge.start_server_thread()
+                logger.info(f"WebSocket bridge started for challenge '{self.name}' on port 4000")
             
         except Exception as e:
             logger.error(f"Failed to start WebSocket bridge: {e}")
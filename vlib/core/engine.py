@@ -6,13 +6,16 @@ vlib - Challenge Engine
 Engine for managing and orchestrating multiple CTF challenges.
 """
 
+import asyncio
+import concurrent.futures
 import logging
 import threading
 import time
 from typing import Dict, List, Callable
 
 import carla
-from vlib.core.challenge import Challenge, ChallengeStatus
+from vlib.core.challenge import Challenge, ChallengeProtocol, ChallengeStatus
+from vlib.core.websocket_bridge import V2XWebSocketServer
 
 logger = logging.getLogger(__name__)
 
@@ -24,33 +27,48 @@ class ChallengeEngine:
     Handles challenge registration, lifecycle management, and status polling.
     """
 
-    def __init__(self, world: carla.World,client: carla.Client, poll_interval: float = 1.0):
+    def __init__(self, world: carla.World,client: carla.Client, poll_interval: float = 1.0,
+                 websocket_port: int = 4000):
         """
         Initialize the Challenge Engine.
 
         Args:
             world: CARLA world instance
             poll_interval: How often to check challenge status (seconds)
+            websocket_port: Port of the WebSocket server shared by all challenges
+
+        Raises:
+            ValueError: If poll_interval is not positive
         """
+        if poll_interval <= 0:
+            raise ValueError(f"poll_interval must be positive, got {poll_interval}")
+
         self.world = world
         self.client = client
         self.poll_interval = poll_interval
+        self.websocket_port = websocket_port
 
         # Challenge management
-        self.challenges: Dict[str, Challenge] = {}
-        self.active_challenges: Dict[str, Challenge] = {}
+        self.challenges: Dict[str, ChallengeProtocol] = {}
+        self.active_challenges: Dict[str, ChallengeProtocol] = {}
+        self._lock = threading.RLock()
+
+        # One WebSocket server shared by every challenge's V2X bridge
+        self.websocket_server: V2XWebSocketServer | None = None
 
         # Polling control
         self._polling = False
         self._poll_thread: threading.Thread | None = None
+        self._poll_wakeup = threading.Event()
+        self._poll_task: asyncio.Task | concurrent.futures.Future | None = None
 
         # Callbacks
-        self.on_challenge_completed: Callable[[Challenge], None] | None = None
-        self.on_challenge_failed: Callable[[Challenge], None] | None = None
+        self.on_challenge_completed: Callable[[ChallengeProtocol], None] | None = None
+        self.on_challenge_failed: Callable[[ChallengeProtocol], None] | None = None
 
         logger.info("Challenge Engine initialized")
 
-    def register_challenge(self, challenge: Challenge) -> bool:
+    def register_challenge(self, challenge: ChallengeProtocol) -> bool:
         """
         Register a new challenge with the engine.
 
@@ -105,15 +123,21 @@ class ChallengeEngine:
             return False
 
         challenge = self.challenges[challenge_id]
+        challenge.client = self.client
 
         # Setup the challenge first
         if not challenge.setup(self.world, self.client):
             logger.error(f"Failed to setup challenge {challenge_id}")
             return False
 
+        if challenge.enable_websocket:
+            # Without a shared server the bridge falls back to serving itself
+            challenge.websocket_server = self._get_websocket_server()
+
         # Start the challenge
         if challenge.start():
-            self.active_challenges[challenge_id] = challenge
+            with self._lock:
+                self.active_challenges[challenge_id] = challenge
             logger.info(f"Started challenge: {challenge.name}")
             return True
         else:
@@ -130,11 +154,12 @@ class ChallengeEngine:
         Returns:
             bool: True if stopped successfully, False otherwise
         """
-        if challenge_id not in self.active_challenges:
+        with self._lock:
+            challenge = self.active_challenges.pop(challenge_id, None)
+        if challenge is None:
             logger.warning(f"Challenge {challenge_id} is not active")
             return False
 
-        challenge = self.active_challenges.pop(challenge_id)
         result = challenge.stop()
 
         if result:
@@ -144,7 +169,7 @@ class ChallengeEngine:
 
         return result
 
-    def get_challenge(self, challenge_id: str) -> Challenge | None:
+    def get_challenge(self, challenge_id: str) -> ChallengeProtocol | None:
         """
         Get a challenge by ID.
 
@@ -156,7 +181,7 @@ class ChallengeEngine:
         """
         return self.challenges.get(challenge_id)
 
-    def get_active_challenges(self) -> List[Challenge]:
+    def get_active_challenges(self) -> List[ChallengeProtocol]:
         """
         Get list of currently active challenges.
 
@@ -165,7 +190,7 @@ class ChallengeEngine:
         """
         return list(self.active_challenges.values())
 
-    def get_all_challenges(self) -> List[Challenge]:
+    def get_all_challenges(self) -> List[ChallengeProtocol]:
         """
         Get list of all registered challenges.
 
@@ -174,53 +199,129 @@ class ChallengeEngine:
         """
         return list(self.challenges.values())
 
-    def start_polling(self):
-        """Start the challenge status polling thread."""
+    def start_polling(self, loop: asyncio.AbstractEventLoop | None = None):
+        """
+        Start challenge status polling.
+
+        Args:
+            loop: Optional running event loop (e.g. the WebSocket bridge loop)
+                to schedule the polling task on instead of a dedicated thread
+        """
+        if self._polling:
+            logger.warning("Polling already started")
+            return
+
+        self._polling = True
+        if loop is not None:
+            self._poll_task = asyncio.run_coroutine_threadsafe(self._poll_loop(), loop)
+        else:
+            self._poll_wakeup.clear()
+            self._poll_thread = threading.Thread(target=self._poll_challenges, daemon=True)
+            self._poll_thread.start()
+        logger.info("Started challenge status polling")
+
+    async def start_polling_async(self):
+        """Start challenge status polling as a task on the running event loop."""
         if self._polling:
             logger.warning("Polling already started")
             return
 
         self._polling = True
-        self._poll_thread = threading.Thread(target=self._poll_challenges, daemon=True)
-        self._poll_thread.start()
+        self._poll_task = asyncio.get_running_loop().create_task(self._poll_loop())
         logger.info("Started challenge status polling")
 
     def stop_polling(self):
-        """Stop the challenge status polling thread."""
+        """Stop the challenge status polling thread or task."""
         if not self._polling:
             return
 
         self._polling = False
+        if self._poll_task:
+            if isinstance(self._poll_task, asyncio.Task):
+                self._poll_task.get_loop().call_soon_threadsafe(self._poll_task.cancel)
+            else:
+                self._poll_task.cancel()
+            self._poll_task = None
         if self._poll_thread:
+            self._poll_wakeup.set()
             self._poll_thread.join(timeout=2.0)
+            self._poll_thread = None
         logger.info("Stopped challenge status polling")
 
+    def _poll_once(self):
+        """Check the status of every active challenge once."""
+        # Snapshot under the lock to avoid modification during iteration
+        with self._lock:
+            active_challenges = tuple(self.active_challenges.values())
+
+        now = time.monotonic()
+        for challenge in active_challenges:
+            self._check_challenge_status(challenge.challenge_id, challenge, now)
+
     def _poll_challenges(self):
         """
         Main polling loop for checking challenge status.
         Runs in a separate thread.
+
+        Ticks are scheduled against absolute monotonic deadlines so the
+        cadence does not drift with the time spent checking challenges.
         """
+        monotonic = time.monotonic
+        wait = self._poll_wakeup.wait
+        poll_once = self._poll_once
+        next_tick = monotonic()
         while self._polling:
             try:
-                # Make a copy to avoid modification during iteration
-                active_challenges = list(self.active_challenges.items())
-
-                for challenge_id, challenge in active_challenges:
-                    self._check_challenge_status(challenge_id, challenge)
+                poll_once()
+            except Exception as e:
+                logger.error(f"Error in challenge polling: {e}")
+            next_tick = self._next_poll_deadline(next_tick, monotonic())
+            wait(next_tick - monotonic())
 
-                time.sleep(self.poll_interval)
+    async def _poll_loop(self):
+        """
+        Main polling coroutine for checking challenge status.
+        Runs as a task on an asyncio event loop.
 
+        The checks make blocking CARLA calls, and a failing challenge is
+        stopped and cleaned up, so each poll runs in a worker thread to keep
+        the loop (usually the WebSocket server's) free for client I/O.
+        """
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while self._polling:
+            try:
+                await asyncio.to_thread(self._poll_once)
             except Exception as e:
                 logger.error(f"Error in challenge polling: {e}")
-                time.sleep(self.poll_interval)
+            next_tick = self._next_poll_deadline(next_tick, loop.time())
+            await asyncio.sleep(next_tick - loop.time())
+
+    def _next_poll_deadline(self, last_tick: float, now: float) -> float:
+        """
+        Compute the next absolute poll deadline.
+
+        Args:
+            last_tick: Deadline of the tick that just ran
+            now: Current monotonic time
 
-    def _check_challenge_status(self, challenge_id: str, challenge: Challenge):
+        Returns:
+            float: Next deadline, skipping ticks missed while overloaded
+        """
+        next_tick = last_tick + self.poll_interval
+        if next_tick < now:
+            missed = (now - last_tick) // self.poll_interval
+            next_tick = last_tick + (missed + 1) * self.poll_interval
+        return next_tick
+
+    def _check_challenge_status(self, challenge_id: str, challenge: ChallengeProtocol, now: float | None = None):
         """
         Check the status of a single challenge and handle state changes.
 
         Args:
             challenge_id: ID of the challenge
             challenge: Challenge instance
+            now: time.monotonic() value shared by every challenge in this poll tick
         """
         try:
             # Check for completion, but don't stop the challenge
@@ -235,13 +336,16 @@ class ChallengeEngine:
                 return
 
             # Challenge is still running (or completed but continuing)
-            status_text = "completed but continuing" if challenge.status == ChallengeStatus.COMPLETED else "running"
-            logger.debug(f"Challenge {challenge.name} {status_text} - "f"Elapsed time: {challenge.get_elapsed_time():.1f}s")
+            if logger.isEnabledFor(logging.DEBUG):
+                status_text = "completed but continuing" if challenge.status == ChallengeStatus.COMPLETED else "running"
+                logger.debug("Challenge %s %s - Elapsed time: %.1fs",
+                             challenge.name, status_text, challenge.get_elapsed_time(now))
 
         except Exception as e:
             logger.error(f"Error checking challenge {challenge_id}: {e}")
             challenge.status = ChallengeStatus.FAILED
-            self.active_challenges.pop(challenge_id, None)
+            with self._lock:
+                self.active_challenges.pop(challenge_id, None)
             challenge.stop()
 
             if self.on_challenge_failed:
@@ -255,19 +359,51 @@ class ChallengeEngine:
         self.stop_polling()
 
         # Stop all active challenges
-        challenge_ids = list(self.active_challenges.keys())
+        with self._lock:
+            challenge_ids = tuple(self.active_challenges)
         for challenge_id in challenge_ids:
             self.stop_challenge(challenge_id)
 
+        if self.websocket_server:
+            self.websocket_server.stop()
+            self.websocket_server = None
+
         logger.info("All challenges stopped")
 
-    def get_status_summary(self) -> dict:
+    def _get_websocket_server(self) -> V2XWebSocketServer | None:
+        """
+        Get the shared WebSocket server, starting it on first use.
+
+        Returns:
+            V2XWebSocketServer: The listening server, or None if it failed to
+            start; the next call tries again
+        """
+        if self.websocket_server is None:
+            server = V2XWebSocketServer(port=self.websocket_port)
+            if not server.start():
+                logger.error(f"Shared WebSocket server failed to start on port {self.websocket_port}")
+                return None
+            self.websocket_server = server
+        return self.websocket_server
+
+    def get_status_summary(self, compact: bool = False) -> dict:
         """
         Get a summary of all challenges and their statuses.
 
+        Args:
+            compact: Report each challenge as a to_tuple() row, with the
+                column names under 'fields', instead of a dict
+
         Returns:
             dict: Summary of challenge statuses
         """
+        if compact:
+            return {
+                'total_challenges': len(self.challenges),
+                'active_challenges': len(self.active_challenges),
+                'fields': Challenge.TUPLE_FIELDS,
+                'challenges': [challenge.to_tuple() for challenge in self.challenges.values()]
+            }
         return {
             'total_challenges': len(self.challenges),
             'active_challenges': len(self.active_challenges),
@@ -1,20 +1,248 @@
 import carla
 import random
+import threading
 import time
 import math
 import logging
 import weakref
+from collections import deque
 from datetime import datetime
-from typing import List, Dict, Any, Callable
+from typing import List, Dict, Any, Callable, Protocol
 
 logger = logging.getLogger(__name__)
 
-# Global registry for V2X sensors
-v2x_sensors = []
+
+class V2XNode(Protocol):
+    """Interface shared by every entry of the V2X sensor registry"""
+    sensor_id: str
+    attach_to: carla.Actor | None
+    location: carla.Location | None
+
+    def receive_cam(self, cam_data: 'CAMData') -> None: ...
+
+    def destroy(self) -> None: ...
+
+
+# Global registry for V2X sensors, keyed by sensor_id. Other threads add and
+# remove sensors, so iterate over a snapshot: tuple(v2x_sensors.values())
+v2x_sensors: dict[str, V2XNode] = {}
+
+
+def register_v2x_node(node: V2XNode) -> None:
+    """Add a node to the registry, destroying any other node registered under its sensor_id"""
+    previous = v2x_sensors.get(node.sensor_id)
+    if previous is not None and previous is not node:
+        # Otherwise the old node would keep sending and receiving unreachable by id
+        logger.warning(f"V2X sensor ID {node.sensor_id} already registered, destroying the old sensor")
+        previous.destroy()
+    v2x_sensors[node.sensor_id] = node
+
+
+class SensorGrid:
+    """Uniform 2D grid over V2X sensor locations for broadcast range queries"""
+
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size
+        # Empty cells are kept so concurrent sensor callbacks never race on deletion
+        self._cells: dict[tuple[int, int], set[V2XNode]] = {}
+        self._node_cells: dict[V2XNode, tuple[int, int]] = {}
+
+    def _cell_of(self, x: float, y: float) -> tuple[int, int]:
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def update(self, node: V2XNode) -> None:
+        """Move a node into the cell of its current location"""
+        if node.location is None:
+            self.remove(node)
+            return
+
+        cell = self._cell_of(node.location.x, node.location.y)
+        old_cell = self._node_cells.get(node)
+        if old_cell == cell:
+            return
+        if old_cell is not None:
+            self._cells[old_cell].discard(node)
+        self._cells.setdefault(cell, set()).add(node)
+        self._node_cells[node] = cell
+
+    def remove(self, node: V2XNode) -> None:
+        """Drop a node from the grid"""
+        old_cell = self._node_cells.pop(node, None)
+        if old_cell is not None:
+            self._cells[old_cell].discard(node)
+
+    def query(self, location: carla.Location, radius: float) -> list[V2XNode]:
+        """Get the nodes in every cell overlapping the square of `radius` around `location`"""
+        min_x, min_y = self._cell_of(location.x - radius, location.y - radius)
+        max_x, max_y = self._cell_of(location.x + radius, location.y + radius)
+
+        candidates: list[V2XNode] = []
+        cells = self._cells
+        for cx in range(min_x, max_x + 1):
+            for cy in range(min_y, max_y + 1):
+                members = cells.get((cx, cy))
+                if members:
+                    candidates.extend(members)
+        return candidates
+
+
+# Spatial index of registered sensors, sized to the CAM broadcast range
+sensor_grid = SensorGrid(cell_size=50.0)
+
+
+def broadcast_cam(sender_id: str, location: carla.Location, max_distance: float,
+                  cam_data: 'CAMData') -> list[V2XNode]:
+    """
+    Deliver a CAM to every other registered sensor within range.
+
+    Args:
+        sender_id: Sensor ID of the sender, which does not receive its own CAM
+        location: Location the CAM is sent from
+        max_distance: Broadcast range (meters)
+        cam_data: Message to deliver
+
+    Returns:
+        list: The sensors that received the message
+    """
+    x, y, z = location.x, location.y, location.z
+    max_distance_sq = max_distance * max_distance
+    recipients: list[V2XNode] = []
+
+    # Query the nearby grid cells, then keep the sensors within range
+    # (squared distances avoid the sqrt)
+    for sensor in sensor_grid.query(location, max_distance):
+        if sensor.sensor_id != sender_id and sensor.location is not None:
+            other = sensor.location
+            distance_sq = (x - other.x) ** 2 + (y - other.y) ** 2 + (z - other.z) ** 2
+
+            if distance_sq <= max_distance_sq:
+                sensor.receive_cam(cam_data)
+                recipients.append(sensor)
+    return recipients
+
+# Sensor blueprints keyed by (world episode id, blueprint name)
+_blueprint_cache: dict[tuple[int, str], carla.ActorBlueprint] = {}
+
+
+def _get_blueprint(world: carla.World, name: str) -> carla.ActorBlueprint:
+    """Find a blueprint, querying the blueprint library only once per world"""
+    key = (world.id, name)
+    blueprint = _blueprint_cache.get(key)
+    if blueprint is None:
+        blueprint = world.get_blueprint_library().find(name)
+        _blueprint_cache[key] = blueprint
+    return blueprint
+
+
+class _SensorPair:
+    """
+    GNSS and IMU actors feeding one or more V2X sensors.
+
+    Sensors attached to the same vehicle share a single pair, so the
+    simulator only runs one GNSS and one IMU per vehicle. The actors are
+    destroyed when the last sensor releases the pair.
+    """
+
+    # Pairs of attached sensors, keyed by the id of the actor they are attached to
+    _shared: dict[int, '_SensorPair'] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, world: carla.World, transform: carla.Transform, attach_to: carla.Actor | None):
+        self.attach_id = attach_to.id if attach_to is not None else None
+        # (GNSS, IMU) callbacks of each sensor using the pair, held weakly
+        self.listeners: list[tuple[weakref.WeakMethod, weakref.WeakMethod]] = []
+
+        self.gnss = world.spawn_actor(
+            _get_blueprint(world, 'sensor.other.gnss'), transform, attach_to=attach_to
+        )
+        try:
+            self.imu = world.spawn_actor(
+                _get_blueprint(world, 'sensor.other.imu'), transform, attach_to=attach_to
+            )
+        except Exception:
+            self.gnss.destroy()
+            raise
+
+        self.gnss.listen(self._on_gnss_data)
+        self.imu.listen(self._on_imu_data)
+
+    @classmethod
+    def acquire(cls, sensor: 'V2XSensor') -> '_SensorPair':
+        """Get the pair for a sensor, spawning it unless its vehicle already has one"""
+        attach_to = sensor.attach_to
+        with cls._shared_lock:
+            pair = cls._shared.get(attach_to.id) if attach_to is not None else None
+            if pair is None or not pair.gnss.is_alive:
+                pair = cls(sensor.world, sensor.transform, attach_to)
+                if attach_to is not None:
+                    cls._shared[attach_to.id] = pair
+            pair.listeners.append(
+                (weakref.WeakMethod(sensor._on_gnss_data), weakref.WeakMethod(sensor._on_imu_data))
+            )
+        return pair
+
+    def release(self, sensor: 'V2XSensor') -> None:
+        """Detach a sensor, destroying the actors if no sensor is left"""
+        with self._shared_lock:
+            self.listeners = [
+                listener for listener in self.listeners
+                if (callback := listener[0]()) is not None and callback.__self__ is not sensor
+            ]
+            if self.listeners:
+                return
+            if self.attach_id is not None and self._shared.get(self.attach_id) is self:
+                del self._shared[self.attach_id]
+
+        for actor in (self.gnss, self.imu):
+            if actor.is_alive:
+                actor.stop()
+                actor.destroy()
+
+    def _on_gnss_data(self, gnss_data):
+        for on_gnss, _ in self.listeners:
+            callback = on_gnss()
+            if callback is not None:
+                callback(gnss_data)
+
+    def _on_imu_data(self, imu_data):
+        for _, on_imu in self.listeners:
+            callback = on_imu()
+            if callback is not None:
+                callback(imu_data)
+
+
+def _vec_to_dict(vec: carla.Vector3D | Dict | None) -> Dict | None:
+    """
+    Convert a CARLA vector, or an {x, y, z} dict as sent by WebSocket clients, to a dict.
+
+    Returns:
+        dict: The vector as a dict, or None for anything else, since
+        clients can send arbitrary values
+    """
+    if not vec:
+        return None
+    if isinstance(vec, dict):
+        return vec
+    if hasattr(vec, "x"):
+        return {"x": vec.x, "y": vec.y, "z": vec.z}
+    return None
 
 
 class CAMData:
-    """Generic Cooperative Awareness Message (CAM) data structure"""
+    """
+    Generic Cooperative Awareness Message (CAM) data structure.
+
+    A broadcast CAM is shared by reference between every receiver, so it
+    must not be modified once it has been sent. Handlers that need a
+    different message should build a new one.
+    """
+    __slots__ = (
+        'sender_id', '_timestamp', '_ts_float', 'vehicle_data', 'extensions',
+        'station_id', 'generation_delta_time', 'station_type', 'include_vehicle_data_container',
+        'position', 'heading', 'speed', 'acceleration', 'yaw_rate',
+        'vehicle_role', 'path_history', '_serialized',
+    )
+
     def __init__(self, sender_id: str, timestamp: datetime, vehicle_data: Dict | None = None, 
                  extensions: Dict | None = None, station_type_override: str | None = None,
                  include_vehicle_data_container: bool = False):
@@ -30,7 +258,7 @@ class CAMData:
         # Basic container
         self.station_type = station_type_override if station_type_override is not None else ("passenger-car" if vehicle_data else "road-side-unit")
         self.include_vehicle_data_container = include_vehicle_data_container
-        vd = vehicle_data or {}
+        vd = self.vehicle_data
         self.position = vd.get("position")
         # self.confidence = vd.get("confidence", 0.95)
 
@@ -43,6 +271,21 @@ class CAMData:
         # Low frequency container
         self.vehicle_role = vd.get("vehicle_role", "default")
         self.path_history = vd.get("path_history", [])
+        # Encoded to_dict() payload, memoized by the WebSocket bridge. Only
+        # the timestamp setter and set_extension() reset it, which is safe
+        # because messages are not modified after they are broadcast
+        self._serialized: str | None = None
+
+    @property
+    def timestamp(self) -> datetime:
+        return self._timestamp
+
+    @timestamp.setter
+    def timestamp(self, value: datetime):
+        self._timestamp = value
+        # POSIX time of the timestamp, cached for the message age queries
+        self._ts_float = value.timestamp() if value else float('-inf')
+        self._serialized = None
 
     def get_extension(self, key: str, default: Any = None) -> Any:
         """Get a value from the extensions dictionary"""
@@ -51,6 +294,7 @@ class CAMData:
     def set_extension(self, key: str, value: Any) -> None:
         """Set a value in the extensions dictionary"""
         self.extensions[key] = value
+        self._serialized = None
 
     def __str__(self):
         ext_str = f", Extensions: {list(self.extensions.keys())}" if self.extensions else ""
@@ -62,28 +306,6 @@ class CAMData:
     
     def to_dict(self) -> Dict:
         """Convert CAMData to dictionary for JSON serialization"""
-        position_dict = None
-        if self.position:
-            if isinstance(self.position, dict):
-                position_dict = self.position
-            elif hasattr(self.position, 'x'):
-                position_dict = {
-                    "x": self.position.x,
-                    "y": self.position.y, 
-                    "z": self.position.z
-                }
-        
-        acceleration_dict = None
-        if self.acceleration:
-            if isinstance(self.acceleration, dict):
-                acceleration_dict = self.acceleration
-            elif hasattr(self.acceleration, 'x'):
-                acceleration_dict = {
-                    "x": self.acceleration.x,
-                    "y": self.acceleration.y,
-                    "z": self.acceleration.z
-                }
-        
         result = {
             "sender_id": self.sender_id,
             "timestamp": self.timestamp.isoformat() if self.timestamp else None,
@@ -91,15 +313,15 @@ class CAMData:
             "station_id": self.station_id,
             "generation_delta_time": self.generation_delta_time,
             "station_type": self.station_type,
-            "position": position_dict,
+            "position": _vec_to_dict(self.position),
             "heading": self.heading,
             "speed": self.speed,
-            "acceleration": acceleration_dict,
+            "acceleration": _vec_to_dict(self.acceleration),
             "yaw_rate": self.yaw_rate,
             "vehicle_role": self.vehicle_role,
             "path_history": self.path_history
         }
-        if getattr(self, "include_vehicle_data_container", False):
+        if self.include_vehicle_data_container:
             result["vehicle_data"] = self.vehicle_data
         return result
     
@@ -148,12 +370,21 @@ class CAMData:
 
 class V2XSensorConfig:
     """Configuration class for V2X sensor parameters"""
+    __slots__ = (
+        'transmit_power', 'receiver_sensitivity', 'frequency', 'filter_distance', 'broadcast_range',
+        'gen_cam_min', 'gen_cam_max', 'low_freq_interval',
+        'position_threshold', 'heading_threshold', 'speed_threshold',
+        'enable_debug_visualization', 'max_message_history', 'communication_timeout',
+        'include_vehicle_data_container',
+    )
+
     def __init__(self):
         # RF parameters
         self.transmit_power = 21.5  # dBm
         self.receiver_sensitivity = -99  # dBm
         self.frequency = 5.9  # GHz
         self.filter_distance = 500  # meters
+        self.broadcast_range = 50  # meters, caps the path-loss range
 
         # CAM generation parameters
         self.gen_cam_min = 0.1  # seconds
@@ -171,63 +402,142 @@ class V2XSensorConfig:
         self.communication_timeout = 2.0  # seconds
         self.include_vehicle_data_container = False
 
+    @property
+    def max_distance(self) -> float:
+        """Transmission range from the path-loss model, capped by filter_distance and broadcast_range"""
+        max_path_loss = abs(self.transmit_power - self.receiver_sensitivity)
+        frequency_loss = 20 * math.log10(self.frequency * 1000) + 32.44
+        return min(
+            10 ** ((max_path_loss - frequency_loss) / 20) * 1000,
+            self.filter_distance,
+            self.broadcast_range
+        )
+
 
 class V2XSensor:
     """Generic V2X sensor implementation following ETSI CAM standard"""
-    
+
+    # How often queued debug lines are drawn, and how long they stay visible (seconds)
+    DEBUG_DRAW_INTERVAL = 0.3
+
+    # Weight of the newest sample in the moving average of _send_cam duration
+    SEND_TIME_SMOOTHING = 0.1
+
+    # Changes below these count as an unchanged sample (m, degrees, m/s)
+    IDLE_POSITION_EPSILON = 1e-4
+    IDLE_HEADING_EPSILON = 0.01
+    IDLE_SPEED_EPSILON = 1e-3
+
+    # __weakref__ keeps the sensor usable with the WeakMethod sample callbacks
+    __slots__ = (
+        'world', 'sensor_id', 'attach_to', 'transform', 'config', '_station_type',
+        '_max_distance',
+        'location', 'previous_location', 'previous_heading', 'previous_speed',
+        'received_messages', 'last_cam_time', 'last_low_freq_time',
+        '_send_time_ewma', '_last_cam_wall_time', '_idle_sample', '_pending_sample_time', '_is_destroyed',
+        'heading', 'speed', 'acceleration', 'gyroscope', 'yaw_rate',
+        'message_handlers', 'message_filters', '_message_filter_state', 'extensions_provider',
+        'gnss_sensor', 'imu_sensor', '_sensor_pair', 'debug_sphere',
+        '_pending_debug_lines', '_last_debug_flush',
+        '__weakref__',
+    )
+
     def __init__(self, world: carla.World, attach_to: carla.Actor | None = None, 
                  sensor_id: str | None = None, transform: carla.Transform | None = None,
                  config: V2XSensorConfig | None = None):
         self.world = world
-        self.sensor_id = sensor_id or f"v2x_{random.randint(1000, 9999)}"
+        self.sensor_id = sensor_id or self._generate_sensor_id()
         self.attach_to = attach_to
         self.transform = transform or carla.Transform()
         self.config = config or V2XSensorConfig()
+        # The parent actor never changes, so neither does the CAM station type
+        self._station_type = self._station_type_for(attach_to)
+
+        # Transmission range; the RF parameters do not change after creation
+        self._max_distance = self.config.max_distance
 
         # Sensor state
         self.location = None
-        self.previous_location = None
+        self.previous_location: tuple[float, float, float] | None = None
         self.previous_heading = None
         self.previous_speed = 0.0
-        self.received_messages = []
-        self.last_cam_time = time.time()
-        self.last_low_freq_time = time.time()
+        self.received_messages: deque[CAMData] = deque(maxlen=self.config.max_message_history)
+        # Simulation time of the last CAM, set from the first GNSS sample
+        self.last_cam_time: float | None = None
+        self.last_low_freq_time: float | None = None
+        # Moving average of the wall time spent in _send_cam (seconds)
+        self._send_time_ewma = 0.0
+        # perf_counter() value when the last CAM was sent
+        self._last_cam_wall_time = 0.0
+        # (x, y, z, heading, speed) of the last sample whose trigger checks found nothing to send
+        self._idle_sample: tuple[float, float, float, float, float] | None = None
+        # Timestamp of the newest GNSS sample not yet run through CAM triggering
+        self._pending_sample_time: float | None = None
         self._is_destroyed = False
 
-        # Initialize dynamic kinematic attributes to satisfy type checkers
+        # Kinematic state, updated by the IMU callback
         self.heading = 0.0
         self.speed = 0.0
-        self.acceleration = None
+        self.acceleration: carla.Vector3D | None = None
+        self.gyroscope: carla.Vector3D | None = None
         self.yaw_rate = 0.0
 
         self.message_handlers: list[Callable[[CAMData], None]] = []
         self.message_filters: list[Callable[[CAMData], bool]] = []
+        # (filter list, its length, combined predicate) the predicate was built
+        # from; rebuilt by receive_cam when message_filters changes
+        self._message_filter_state: tuple[list, int, Callable[[CAMData], bool] | None] = (
+            self.message_filters, 0, None)
         self.extensions_provider: Callable[[], Dict] | None = None
 
         self.gnss_sensor = None
         self.imu_sensor = None
+        self._sensor_pair: _SensorPair | None = None
         self.debug_sphere = None
+        # Latest CAM line per receiver, drawn in batches by _flush_debug_lines()
+        self._pending_debug_lines: dict[str, tuple[carla.Location, carla.Location]] = {}
+        self._last_debug_flush: float | None = None
 
         self._init_sensor()
-        v2x_sensors.append(self)
+        register_v2x_node(self)
+        cam_scheduler.register(self)
         logger.info(f"V2X Sensor {self.sensor_id} created")
 
+    @staticmethod
+    def _station_type_for(actor: carla.Actor | None) -> str | None:
+        """
+        Infer the CAM station type from the actor a sensor is attached to.
+
+        Args:
+            actor: Parent actor of the sensor, if any
+
+        Returns:
+            str: Station type override, or None to let CAMData decide
+        """
+        tid = getattr(actor, "type_id", None) if actor else None
+        if not isinstance(tid, str):
+            return None
+        if tid.startswith("vehicle."):
+            return "passenger-car"
+        if tid.startswith("traffic."):
+            return "road-side-unit"
+        return None
+
+    @staticmethod
+    def _generate_sensor_id() -> str:
+        """Generate a random sensor ID that is not in the registry yet"""
+        while True:
+            sensor_id = f"v2x_{random.randint(1000, 9999)}"
+            if sensor_id not in v2x_sensors:
+                return sensor_id
+
     def _init_sensor(self):
         """Initialize the V2X sensor with GNSS and IMU sensors"""
         try:
-            gnss_bp = self.world.get_blueprint_library().find('sensor.other.gnss')
-            self.gnss_sensor = self.world.spawn_actor(
-                gnss_bp, self.transform, attach_to=self.attach_to
-            )
+            self._sensor_pair = _SensorPair.acquire(self)
+            self.gnss_sensor = self._sensor_pair.gnss
+            self.imu_sensor = self._sensor_pair.imu
 
-            imu_bp = self.world.get_blueprint_library().find('sensor.other.imu')
-            self.imu_sensor = self.world.spawn_actor(
-                imu_bp, self.transform, attach_to=self.attach_to
-            )
-
-            weak_self = weakref.ref(self)
-            self.gnss_sensor.listen(lambda data: V2XSensor._on_gnss_data(weak_self, data))
-            self.imu_sensor.listen(lambda data: V2XSensor._on_imu_data(weak_self, data))
             if self.config.enable_debug_visualization and self.attach_to is None:
                 self.debug_sphere = self.world.debug.draw_point(
                     self.transform.location,
@@ -238,123 +548,209 @@ class V2XSensor:
         except Exception as e:
             logger.error(f"Failed to initialize sensor {self.sensor_id}: {e}")
 
-    @staticmethod
-    def _on_gnss_data(weak_self, gnss_data):
+    def _on_gnss_data(self, gnss_data):
         """Callback for GNSS data"""
-        self = weak_self()
-        if not self or self._is_destroyed:
+        if self._is_destroyed:
             return
 
+        # Samples only arrive while the GNSS actor is listening, and destroy()
+        # sets _is_destroyed before releasing it, so is_alive is not polled here
         try:
-            if self.gnss_sensor and self.gnss_sensor.is_alive:
-                if self.attach_to and hasattr(self.attach_to, 'is_alive') and self.attach_to.is_alive:
-                    self.location = self.attach_to.get_location()
-                elif self.gnss_sensor and self.gnss_sensor.is_alive:
-                    self.location = self.gnss_sensor.get_transform().location
-                else:
-                    return  # Skip if both sensors/actors are invalid
-
-                self._check_cam_conditions()
+            if self.attach_to is None:
+                self.location = self.gnss_sensor.get_transform().location
+            elif self.attach_to.is_alive:
+                self.location = self.attach_to.get_location()
+            else:
+                return  # Skip if the vehicle is gone
+
+            sensor_grid.update(self)
+            # CAM generation runs on the scheduler thread, keep the callback short
+            self._pending_sample_time = gnss_data.timestamp
         except (RuntimeError, AttributeError) as e:
-            logger.debug(f"GNSS callback error for {self.sensor_id}: {e}")
+            logger.debug("GNSS callback error for %s: %s", self.sensor_id, e)
             return
 
-    @staticmethod
-    def _on_imu_data(weak_self, imu_data):
+    def _on_imu_data(self, imu_data):
         """Callback for IMU data"""
-        self = weak_self()
-        if not self or self._is_destroyed:
+        if self._is_destroyed:
             return
 
         try:
             self.acceleration = imu_data.accelerometer
             self.gyroscope = imu_data.gyroscope
 
-            if self.attach_to and hasattr(self.attach_to, 'is_alive') and self.attach_to.is_alive:
-                if hasattr(self.attach_to, 'get_transform'):
-                    self.heading = self.attach_to.get_transform().rotation.yaw
+            if self.attach_to and self.attach_to.is_alive:
+                self.heading = self.attach_to.get_transform().rotation.yaw
 
-                if hasattr(self.attach_to, 'get_velocity'):
-                    velocity = self.attach_to.get_velocity()
-                    self.speed = math.sqrt(velocity.x**2 + velocity.y**2 + velocity.z**2)
-                    self.yaw_rate = self.gyroscope.z
+                velocity = self.attach_to.get_velocity()
+                self.speed = math.hypot(velocity.x, velocity.y, velocity.z)
+                self.yaw_rate = self.gyroscope.z
         except (RuntimeError, AttributeError) as e:
-            logger.debug(f"IMU callback error for {self.sensor_id}: {e}")
+            logger.debug("IMU callback error for %s: %s", self.sensor_id, e)
             return
 
     def add_message_handler(self, handler: Callable[[CAMData], None]) -> None:
-        """Add a message handler function that will be called for each received message"""
+        """Add a message handler function that will be called for each received message; handlers must not modify it"""
         self.message_handlers.append(handler)
 
+    def remove_message_handler(self, handler: Callable[[CAMData], None]) -> None:
+        """Remove a message handler previously added with add_message_handler"""
+        # Rebind rather than mutate, so a receive_cam running on a sensor
+        # thread keeps iterating the list it started with
+        self.message_handlers = [h for h in self.message_handlers if h != handler]
+
     def add_message_filter(self, filter_func: Callable[[CAMData], bool]) -> None:
         """Add a message filter function. Only messages passing all filters will be processed"""
         self.message_filters.append(filter_func)
 
+    @staticmethod
+    def _combine_filters(filters: list[Callable[[CAMData], bool]]) -> Callable[[CAMData], bool] | None:
+        """
+        Combine message filters into a single predicate.
+
+        Args:
+            filters: Filters that must all pass
+
+        Returns:
+            Callable: The filter itself when there is only one, otherwise a
+            predicate checking each in order, or None when there are none
+        """
+        if not filters:
+            return None
+        if len(filters) == 1:
+            return filters[0]
+
+        frozen = tuple(filters)
+
+        def combined(cam_data: CAMData) -> bool:
+            for filter_func in frozen:
+                if not filter_func(cam_data):
+                    return False
+            return True
+        return combined
+
     def set_extensions_provider(self, provider: Callable[[], Dict]) -> None:
         """Set a function that provides custom extensions for outgoing CAM messages"""
         self.extensions_provider = provider
 
-    def _check_cam_conditions(self):
-        """Check ETSI CAM standard triggering conditions"""
-        current_time = time.time()
+    def _process_pending_sample(self):
+        """Run CAM triggering for the newest GNSS sample, if one arrived since the last call"""
+        sample_time = self._pending_sample_time
+        if sample_time is None or self._is_destroyed:
+            return
+        self._pending_sample_time = None
+        self._check_cam_conditions(sample_time)
+
+    def _check_cam_conditions(self, current_time: float):
+        """
+        Check ETSI CAM standard triggering conditions.
+
+        Args:
+            current_time: Simulation time of the sensor sample, in seconds
+        """
+        if self.last_cam_time is None:
+            self.last_cam_time = current_time
+            self.last_low_freq_time = current_time
+            return
+
+        config = self.config
+        if config.enable_debug_visualization:
+            self._flush_debug_lines(current_time)
+
+        # Read the sample once; the GNSS and IMU callbacks keep updating
+        # these from CARLA's sensor thread while this runs
+        location = self.location
+        heading = self.heading
+        speed = self.speed
+        elapsed = current_time - self.last_cam_time
+
         should_send = False
-        
+        debug = logger.isEnabledFor(logging.DEBUG)
+
         # Always check maximum time condition
-        if current_time - self.last_cam_time >= self.config.gen_cam_max:
+        if elapsed >= config.gen_cam_max:
             should_send = True
-            logger.debug(f"CAM triggered for {self.sensor_id}: Maximum time elapsed")
+            logger.debug("CAM triggered for %s: Maximum time elapsed", self.sensor_id)
 
         # Check minimum time condition
-        elif current_time - self.last_cam_time < self.config.gen_cam_min:
+        elif elapsed < config.gen_cam_min:
+            return
+
+        # Back off when broadcasting cannot keep up: all sensors send from the
+        # one scheduler thread. The send time is wall time, so it is compared
+        # with the wall time since the last CAM, not the simulation time
+        elif time.perf_counter() - self._last_cam_wall_time < 2 * self._send_time_ewma * len(v2x_sensors):
+            return
+
+        # Nothing moved since the checks last came up empty, so they would again
+        elif self._is_idle_sample():
             return
 
         # Check other triggering conditions
         elif self.previous_location and self.attach_to:
             # Check heading change
-            if self.previous_heading is not None and hasattr(self, 'heading'):
-                heading_diff = abs(self.heading - self.previous_heading)
-                if heading_diff > self.config.heading_threshold or heading_diff > (360 - self.config.heading_threshold):
+            if self.previous_heading is not None:
+                # Smallest angle between the headings, so -179° to 179° is a 2° change
+                heading_diff = abs(heading - self.previous_heading) % 360
+                heading_diff = min(heading_diff, 360 - heading_diff)
+                if heading_diff > config.heading_threshold:
                     should_send = True
-                    logger.debug(f"CAM triggered for {self.sensor_id}: Heading change {heading_diff:.2f}°")
-
-            # Check position change
-            if self.location:
-                distance = math.sqrt(
-                    (self.location.x - self.previous_location.x) ** 2 +
-                    (self.location.y - self.previous_location.y) ** 2 +
-                    (self.location.z - self.previous_location.z) ** 2
-                )
-                if distance > self.config.position_threshold:
+                    logger.debug("CAM triggered for %s: Heading change %.2f°", self.sensor_id, heading_diff)
+
+            # Check position change (squared distances avoid the sqrt)
+            if location:
+                prev_x, prev_y, prev_z = self.previous_location
+                dx = location.x - prev_x
+                dy = location.y - prev_y
+                dz = location.z - prev_z
+                distance_sq = dx * dx + dy * dy + dz * dz
+                threshold = config.position_threshold
+                if distance_sq > threshold * threshold:
                     should_send = True
-                    logger.debug(f"CAM triggered for {self.sensor_id}: Position change {distance:.2f}m")
+                    if debug:
+                        logger.debug("CAM triggered for %s: Position change %.2fm",
+                                     self.sensor_id, math.sqrt(distance_sq))
 
             # Check speed change
-            if hasattr(self, 'speed') and hasattr(self, 'previous_speed'):
-                speed_diff = abs(self.speed - self.previous_speed)
-                if speed_diff > self.config.speed_threshold:
-                    should_send = True
-                    logger.debug(f"CAM triggered for {self.sensor_id}: Speed change {speed_diff:.2f}m/s")
+            speed_diff = abs(speed - self.previous_speed)
+            if speed_diff > config.speed_threshold:
+                should_send = True
+                logger.debug("CAM triggered for %s: Speed change %.2fm/s", self.sensor_id, speed_diff)
 
         # Check low frequency container time
-        low_freq_elapsed = current_time - self.last_low_freq_time
-        include_low_freq = low_freq_elapsed >= self.config.low_freq_interval
+        include_low_freq = current_time - self.last_low_freq_time >= config.low_freq_interval
 
         if should_send:
+            started = time.perf_counter()
             self._send_cam(include_low_freq)
+            self._send_time_ewma += self.SEND_TIME_SMOOTHING * (
+                time.perf_counter() - started - self._send_time_ewma)
+            self._last_cam_wall_time = started
             self.last_cam_time = current_time
 
             # Store current values as previous
-            if self.location:
-                self.previous_location = carla.Location(
-                    x=self.location.x, y=self.location.y, z=self.location.z
-                )
-            if hasattr(self, 'heading'):
-                self.previous_heading = self.heading
-            if hasattr(self, 'speed'):
-                self.previous_speed = self.speed
+            if location:
+                self.previous_location = (location.x, location.y, location.z)
+            self.previous_heading = heading
+            self.previous_speed = speed
 
             if include_low_freq:
                 self.last_low_freq_time = current_time
+            self._idle_sample = None
+        elif location:
+            self._idle_sample = (location.x, location.y, location.z, heading, speed)
+
+    def _is_idle_sample(self) -> bool:
+        """Check whether the current sample matches the last one that triggered nothing"""
+        idle = self._idle_sample
+        location = self.location
+        if idle is None or location is None:
+            return False
+
+        x, y, z, heading, speed = idle
+        return (abs(location.x - x) + abs(location.y - y) + abs(location.z - z) < self.IDLE_POSITION_EPSILON
+                and abs(self.heading - heading) < self.IDLE_HEADING_EPSILON
+                and abs(self.speed - speed) < self.IDLE_SPEED_EPSILON)
 
     def _send_cam(self, include_low_freq=False):
         """Send Cooperative Awareness Message (CAM)"""
@@ -365,7 +761,7 @@ class V2XSensor:
         vehicle_data = None
         if self.attach_to:
             velocity = self.attach_to.get_velocity()
-            acceleration = getattr(self, 'acceleration', carla.Vector3D(0, 0, 0))
+            acceleration = self.acceleration
             
             vehicle_data = {
                 "position": {
@@ -373,8 +769,8 @@ class V2XSensor:
                     "y": self.location.y,
                     "z": self.location.z
                 },
-                "heading": getattr(self, 'heading', 0.0),
-                "speed": getattr(self, 'speed', 0.0),
+                "heading": self.heading,
+                "speed": self.speed,
                 "velocity": {
                     "x": velocity.x,
                     "y": velocity.y,
@@ -385,11 +781,11 @@ class V2XSensor:
                     "y": acceleration.y,
                     "z": acceleration.z
                 } if acceleration else None,
-                "yaw_rate": getattr(self, 'yaw_rate', 0.0)
+                "yaw_rate": self.yaw_rate
             }
 
         # Get custom extensions if provider is set
-        extensions = {}
+        extensions = None
         if self.extensions_provider:
             try:
                 extensions = self.extensions_provider()
@@ -397,85 +793,80 @@ class V2XSensor:
                 logger.warning(f"Extensions provider failed for {self.sensor_id}: {e}")
 
         # Create CAM message
-        station_type_override = None
-        try:
-            if self.attach_to and hasattr(self.attach_to, "type_id"):
-                tid = self.attach_to.type_id
-                if isinstance(tid, str):
-                    if tid.startswith("vehicle."):
-                        station_type_override = "passenger-car"
-                    elif tid.startswith("traffic.traffic_light") or tid.startswith("traffic."):
-                        station_type_override = "road-side-unit"
-        except Exception:
-            station_type_override = station_type_override  # no-op
-
         cam_data = CAMData(
             sender_id=self.sensor_id,
             timestamp=datetime.now(),
             vehicle_data=vehicle_data,
             extensions=extensions,
-            station_type_override=station_type_override,
-            include_vehicle_data_container=getattr(self.config, "include_vehicle_data_container", False)
+            station_type_override=self._station_type,
+            include_vehicle_data_container=self.config.include_vehicle_data_container
         )
         
-        logger.debug(f"Sensor {self.sensor_id} sending CAM: {cam_data}")
-        # Calculate transmission range
-        max_path_loss = abs(self.config.transmit_power - self.config.receiver_sensitivity)
-        frequency_loss = 20 * math.log10(self.config.frequency * 1000) + 32.44
-        max_distance = min(
-            10 ** ((max_path_loss - frequency_loss) / 20) * 1000,
-            self.config.filter_distance
-        )
-        max_distance = 50
-
-        # Broadcast to all other V2X sensors within range
-        for sensor in v2x_sensors:
-            if sensor.sensor_id != self.sensor_id and sensor.location is not None:
-                distance = math.sqrt(
-                    (self.location.x - sensor.location.x) ** 2 +
-                    (self.location.y - sensor.location.y) ** 2 +
-                    (self.location.z - sensor.location.z) ** 2
-                )
+        logger.debug("Sensor %s sending CAM: %s", self.sensor_id, cam_data)
+        location = self.location
+        recipients = broadcast_cam(self.sensor_id, location, self._max_distance, cam_data)
+
+        # Debug visualization, drawn later by _flush_debug_lines()
+        if self.config.enable_debug_visualization:
+            for sensor in recipients:
+                other = sensor.location
+                if other is not None:
+                    self._pending_debug_lines[sensor.sensor_id] = (location, other)
+
+    def _flush_debug_lines(self, current_time: float):
+        """
+        Draw the queued CAM debug lines, at most once per DEBUG_DRAW_INTERVAL.
+
+        Args:
+            current_time: Simulation time of the sensor sample, in seconds
+        """
+        if (self._last_debug_flush is not None
+                and current_time - self._last_debug_flush < self.DEBUG_DRAW_INTERVAL):
+            return
+        self._last_debug_flush = current_time
 
-                if distance <= max_distance:
-                    sensor.receive_cam(cam_data)
+        if not self._pending_debug_lines:
+            return
+        lines = self._pending_debug_lines
+        self._pending_debug_lines = {}
 
-                    # Debug visualization
-                    if self.config.enable_debug_visualization:
-                        self.world.debug.draw_line(
-                            self.location,
-                            sensor.location,
-                            color=carla.Color(0, 0, 255),
-                            life_time=self.config.gen_cam_min
-                        )
+        color = carla.Color(0, 0, 255)
+        for start, end in lines.values():
+            self.world.debug.draw_line(start, end, color=color, life_time=self.DEBUG_DRAW_INTERVAL)
 
     def receive_cam(self, cam_data: CAMData):
         """Receive and process a CAM message"""
-        for filter_func in self.message_filters:
-            if not filter_func(cam_data):
-                logger.debug(f"Sensor {self.sensor_id} - CAM from {cam_data.sender_id} filtered out")
-                return
+        filters = self.message_filters
+        state = self._message_filter_state
+        if state[0] is not filters or state[1] != len(filters):
+            # Filters were added or removed, possibly on the list directly
+            state = (filters, len(filters), self._combine_filters(filters))
+            self._message_filter_state = state
+        message_filter = state[2]
+        if message_filter is not None and not message_filter(cam_data):
+            logger.debug("Sensor %s - CAM from %s filtered out", self.sensor_id, cam_data.sender_id)
+            return
 
+        # Oldest messages fall off the ring buffer once history is full. Other
+        # threads append while readers run, so readers loop over a tuple() copy
         self.received_messages.append(cam_data)
-        if len(self.received_messages) > self.config.max_message_history:
-            self.received_messages = self.received_messages[-self.config.max_message_history:]
-        
+
         for handler in self.message_handlers:
             try:
                 handler(cam_data)
             except Exception as e:
                 logger.error(f"Message handler failed for {self.sensor_id}: {e}")
 
-        logger.debug(f"Sensor {self.sensor_id} received CAM from {cam_data.sender_id}")
+        logger.debug("Sensor %s received CAM from %s", self.sensor_id, cam_data.sender_id)
 
     def get_recent_messages(self, max_age: float | None = None) -> List[CAMData]:
         """Get recent messages, optionally filtered by age"""
         if max_age is None:
-            return self.received_messages.copy()
+            return list(self.received_messages)
         
         cutoff_time = datetime.now().timestamp() - max_age
-        return [msg for msg in self.received_messages 
-                if msg.timestamp.timestamp() > cutoff_time]
+        return [msg for msg in tuple(self.received_messages)
+                if msg._ts_float > cutoff_time]
 
     def get_messages_from_sender(self, sender_id: str, max_age: float | None = None) -> List[CAMData]:
         """Get messages from a specific sender"""
@@ -484,8 +875,12 @@ class V2XSensor:
 
     def get_latest_message_from_sender(self, sender_id: str, max_age: float | None = None) -> CAMData | None:
         """Get the latest message from a specific sender"""
-        messages = self.get_messages_from_sender(sender_id, max_age)
-        return messages[-1] if messages else None
+        cutoff_time = None if max_age is None else datetime.now().timestamp() - max_age
+        # Newest first, so the first fresh match from this sender is the answer
+        for msg in reversed(tuple(self.received_messages)):
+            if msg.sender_id == sender_id and (cutoff_time is None or msg._ts_float > cutoff_time):
+                return msg
+        return None
 
     def is_communication_active(self, sender_id: str, timeout: float | None = None) -> bool:
         """Check if communication with a specific sender is active"""
@@ -497,11 +892,19 @@ class V2XSensor:
 
     def get_communication_status(self, sender_ids: List[str] | None = None) -> Dict[str, bool]:
         """Get communication status with specified senders or all known senders"""
+        # Newest message time per sender, in one pass over the history
+        latest: Dict[str, float] = {}
+        for msg in tuple(self.received_messages):
+            if msg._ts_float > latest.get(msg.sender_id, float('-inf')):
+                latest[msg.sender_id] = msg._ts_float
+
+        now = datetime.now().timestamp()
         if sender_ids is None:
             # Get all unique sender IDs from recent messages
-            sender_ids = list(set(msg.sender_id for msg in self.get_recent_messages(10.0)))
-        
-        return {sender_id: self.is_communication_active(sender_id) 
+            sender_ids = [sender_id for sender_id, ts in latest.items() if ts > now - 10.0]
+
+        cutoff_time = now - self.config.communication_timeout
+        return {sender_id: latest.get(sender_id, float('-inf')) > cutoff_time
                 for sender_id in sender_ids}
 
     def destroy(self):
@@ -509,22 +912,21 @@ class V2XSensor:
         try:
             self._is_destroyed = True
             
-            if self.gnss_sensor is not None and self.gnss_sensor.is_alive:
-                self.gnss_sensor.stop()
-                self.gnss_sensor.destroy()
-                self.gnss_sensor = None
-
-            if self.imu_sensor is not None and self.imu_sensor.is_alive:
-                self.imu_sensor.stop()
-                self.imu_sensor.destroy()
-                self.imu_sensor = None
+            # The GNSS and IMU actors go away with the last sensor on this vehicle
+            if self._sensor_pair is not None:
+                self._sensor_pair.release(self)
+                self._sensor_pair = None
+            self.gnss_sensor = None
+            self.imu_sensor = None
 
             self.received_messages.clear()
             self.message_handlers.clear()
             self.message_filters.clear()
 
-            if self in v2x_sensors:
-                v2x_sensors.remove(self)
+            cam_scheduler.unregister(self)
+            sensor_grid.remove(self)
+            if v2x_sensors.get(self.sensor_id) is self:
+                del v2x_sensors[self.sensor_id]
 
             logger.info(f"V2X Sensor {self.sensor_id} destroyed")
         except Exception as e:
@@ -532,6 +934,73 @@ class V2XSensor:
             self._is_destroyed = True
 
 
+class CAMScheduler:
+    """
+    Background thread that runs CAM generation for the registered V2X sensors.
+
+    GNSS callbacks only record their latest sample; this thread picks it up
+    at a fixed rate so slow receivers never hold up CARLA's sensor thread.
+    The thread starts with the first registered sensor and exits once the
+    last one is unregistered.
+    """
+
+    def __init__(self, rate: float = 20.0):
+        """
+        Initialize the scheduler.
+
+        Args:
+            rate: How often pending samples are processed (Hz)
+        """
+        self.interval = 1.0 / rate
+        self._sensors: set[V2XSensor] = set()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def register(self, sensor: V2XSensor) -> None:
+        """Add a sensor and start the worker thread if it is not running"""
+        with self._lock:
+            self._sensors.add(sensor)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="v2x-cam-scheduler", daemon=True)
+                self._thread.start()
+
+    def unregister(self, sensor: V2XSensor) -> None:
+        """Remove a sensor; the worker thread exits when none are left"""
+        with self._lock:
+            self._sensors.discard(sensor)
+
+    def _run(self):
+        """Worker loop, scheduled against monotonic deadlines"""
+        monotonic = time.monotonic
+        next_tick = monotonic()
+        while True:
+            with self._lock:
+                if not self._sensors:
+                    self._thread = None
+                    return
+                sensors = tuple(self._sensors)
+
+            for sensor in sensors:
+                try:
+                    sensor._process_pending_sample()
+                except (RuntimeError, AttributeError) as e:
+                    logger.debug("CAM processing error for %s: %s", sensor.sensor_id, e)
+                except Exception as e:
+                    logger.error(f"CAM processing failed for {sensor.sensor_id}: {e}")
+
+            next_tick += self.interval
+            now = monotonic()
+            if next_tick < now:
+                # Overloaded, skip the missed ticks instead of bursting
+                next_tick = now
+            else:
+                time.sleep(next_tick - now)
+
+
+# Shared CAM generation thread for all V2X sensors
+cam_scheduler = CAMScheduler()
+
+
 # Utility functions for common message filtering and handling
 class V2XUtils:
     """Utility functions for common V2X operations"""
@@ -555,16 +1024,16 @@ class V2XUtils:
     @staticmethod
     def create_distance_filter(sensor: V2XSensor, max_distance: float) -> Callable[[CAMData], bool]:
         """Create a filter that only passes messages from senders within a certain distance"""
+        max_distance_sq = max_distance * max_distance
+
         def filter_func(cam_data: CAMData) -> bool:
             if not cam_data.position or not sensor.location:
                 return True  # Can't filter without position data
-            
-            distance = math.sqrt(
-                (sensor.location.x - cam_data.position['x']) ** 2 +
-                (sensor.location.y - cam_data.position['y']) ** 2 +
-                (sensor.location.z - cam_data.position['z']) ** 2
-            )
-            return distance <= max_distance
+
+            dx = sensor.location.x - cam_data.position['x']
+            dy = sensor.location.y - cam_data.position['y']
+            dz = sensor.location.z - cam_data.position['z']
+            return dx * dx + dy * dy + dz * dz <= max_distance_sq
         return filter_func
 
     @staticmethod
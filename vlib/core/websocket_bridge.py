@@ -3,66 +3,171 @@ import json
 import logging
 import threading
 import weakref
+from collections import deque
 from typing import Dict, Any, Callable
 import websockets
-from websockets.server import WebSocketServerProtocol
+from websockets.asyncio.server import ServerConnection, Server, serve
 
-from .sensors import V2XSensor, CAMData, v2x_sensors
+from .sensors import (
+    V2XSensor, V2XSensorConfig, CAMData, v2x_sensors, sensor_grid, broadcast_cam, register_v2x_node
+)
 import carla
 
 logger = logging.getLogger(__name__)
 
+# orjson is several times faster than the stdlib codec on the CAM hot path;
+# frames are still sent as text so existing clients keep working
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError
+    _loads = orjson.loads
+except ImportError:
+    _dumps = json.dumps
+    _loads = json.loads
+
+# Run server threads on uvloop when it is installed; the default policy is
+# left alone so other event loops in the process are unaffected
+try:
+    import uvloop
+    _new_event_loop = uvloop.new_event_loop
+except ImportError:
+    _new_event_loop = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Subprotocol clients offer to receive and send msgpack binary frames
+MSGPACK_SUBPROTOCOL = "v2x.msgpack"
+
+
+def _select_subprotocol(connection: ServerConnection, subprotocols: list[str]) -> str | None:
+    """Pick msgpack when the client offers it; otherwise accept the handshake without a subprotocol"""
+    return MSGPACK_SUBPROTOCOL if MSGPACK_SUBPROTOCOL in subprotocols else None
+
+
+class _JSONCodec:
+    """Default wire format: JSON text frames"""
+
+    name = "JSON"
+
+    @staticmethod
+    def encode(message: Dict) -> str:
+        return _dumps(message)
+
+    @staticmethod
+    def decode(frame: str | bytes) -> Any:
+        return _loads(frame)
+
+    @staticmethod
+    def cam_payload(cam_data: CAMData) -> str:
+        """Encoded CAM payload, memoized on the message across bridges"""
+        payload = cam_data._serialized
+        if payload is None:
+            payload = cam_data._serialized = _dumps(cam_data.to_dict())
+        return payload
+
+    @staticmethod
+    def cam_frame(payload: str) -> str:
+        return f'{{"type":"cam","payload":{payload}}}'
+
+    @staticmethod
+    def cam_batch_frame(payloads: list[str]) -> str:
+        return f'{{"type":"cam_batch","payload":[{",".join(payloads)}]}}'
+
+
+class _MsgpackCodec:
+    """Wire format of clients negotiating MSGPACK_SUBPROTOCOL: msgpack binary frames"""
+
+    name = "msgpack"
+
+    @staticmethod
+    def encode(message: Dict) -> bytes:
+        return msgpack.packb(message, use_bin_type=True)
+
+    @staticmethod
+    def decode(frame: str | bytes) -> Any:
+        # Tolerate text frames from clients that still send JSON
+        if isinstance(frame, str):
+            return _loads(frame)
+        return msgpack.unpackb(frame, raw=False)
+
+    @staticmethod
+    def cam_payload(cam_data: CAMData) -> Dict:
+        return cam_data.to_dict()
+
+    @classmethod
+    def cam_frame(cls, payload: Dict) -> bytes:
+        return cls.encode({"type": "cam", "payload": payload})
+
+    @classmethod
+    def cam_batch_frame(cls, payloads: list[Dict]) -> bytes:
+        return cls.encode({"type": "cam_batch", "payload": payloads})
+
 
 class V2XWebSocketBridge:
     """WebSocket bridge that acts as a proxy for the player vehicle's V2X sensor"""
+
+    # Maximum number of CAM messages coalesced into one outbound frame
+    MAX_BATCH_SIZE = 64
+    # Maximum number of CAM messages waiting to be written to the client;
+    # the oldest are dropped once a slow client lets the queue fill up
+    OUTBOUND_QUEUE_SIZE = 512
+    # Minimum time between warnings about dropped CAM messages (seconds)
+    DROP_WARNING_INTERVAL = 5.0
     
-    def __init__(self, player_vehicle: carla.Vehicle, world: carla.World, port: int = 4000):
+    def __init__(self, player_vehicle: carla.Vehicle, world: carla.World, port: int = 4000,
+                 challenge_id: str = "default"):
         self.player_vehicle = player_vehicle
         self.world = world
         self.port = port
+        self.challenge_id = challenge_id
         
-        self.websocket: WebSocketServerProtocol | None = None
-        self.server = None
-        self.server_task = None
-        self.loop = None
+        self.websocket: ServerConnection | None = None
+        # Server hosting this bridge; either shared through the ChallengeEngine
+        # or created by start_server()/start_server_thread() for this bridge only
+        self.server: V2XWebSocketServer | None = None
+        self._owns_server = False
         
-        self.server_thread: threading.Thread | None = None 
         self.player_sensor: V2XSensor | None = None
-        self.original_message_handlers = []
         self.virtual_sensor: WebSocketVirtualSensor | None = None
+
+        # Outbound CAM payloads, drained by the writer task of the connected
+        # client; only touched from the event loop thread
+        self._out_queue: deque | None = None
+        self._out_ready: asyncio.Event | None = None
+        self._writer_task: asyncio.Task | None = None
+        # CAM messages dropped because the client fell behind
+        self.dropped_messages = 0
+        self._last_drop_warning: float | None = None
+        # Wire format negotiated with the connected client
+        self._codec: type[_JSONCodec] | type[_MsgpackCodec] = _JSONCodec
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop | None:
+        """Event loop of the hosting WebSocket server"""
+        return self.server.loop if self.server else None
         
     async def start_server(self):
-        """Start the WebSocket server"""
-        logger.info(f"Starting WebSocket server on port {self.port}")
-        try:
-            async def handler(websocket):
-                path = getattr(websocket, 'path', '/')
-                await self.handle_client(websocket, path)
-                
-            self.server = await websockets.serve(
-                handler,
-                "localhost",
-                self.port,
-                max_size=1024*1024,  # 1MB max message size
-                ping_interval=20,
-                ping_timeout=10
-            )
-            logger.info(f"WebSocket server started on ws://localhost:{self.port}")
-        except Exception as e:
-            logger.error(f"Failed to start WebSocket server: {e}")
+        """Serve this bridge on its own port until the server is closed"""
+        server = V2XWebSocketServer(port=self.port)
+        server.register_bridge(self)
+        self._owns_server = True
+        await server.serve()
             
     def start_server_thread(self):
-        """Start WebSocket server in a separate thread"""
-        def run_server():
-            self.loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(self.loop)
-            self.server_task = self.loop.create_task(self.start_server())
-            self.loop.run_forever()
-            
-        self.server_thread = threading.Thread(target=run_server, daemon=True)
-        self.server_thread.start()
+        """Start a WebSocket server for this bridge only in a separate thread"""
+        server = V2XWebSocketServer(port=self.port)
+        server.register_bridge(self)
+        self._owns_server = True
+        server.start()
         
-    async def handle_client(self, websocket: WebSocketServerProtocol, path: str = ""):
+    async def handle_client(self, websocket: ServerConnection, path: str = ""):
         """Handle WebSocket client connection"""
         if self.websocket is not None:
             logger.warning("Another client tried to connect, but only one connection is allowed")
@@ -71,6 +176,13 @@ class V2XWebSocketBridge:
             
         self.websocket = websocket
         logger.info(f"WebSocket client connected from {websocket.remote_address}")
+
+        self._codec = _MsgpackCodec if websocket.subprotocol == MSGPACK_SUBPROTOCOL else _JSONCodec
+        logger.debug(f"WebSocket client uses {self._codec.name} frames")
+
+        self._out_queue = deque(maxlen=self.OUTBOUND_QUEUE_SIZE)
+        self._out_ready = asyncio.Event()
+        self._writer_task = asyncio.create_task(self._writer_loop(self._out_queue, self._out_ready))
         
         try:
             # Find and setup player sensor proxy
@@ -91,8 +203,7 @@ class V2XWebSocketBridge:
             logger.info("WebSocket client disconnected")
         except Exception as e:
             logger.error(f"Error handling WebSocket client: {e}")
-            import traceback
-            logger.debug(f"Full traceback: {traceback.format_exc()}")
+            logger.debug("Full traceback:", exc_info=True)
         finally:
             await self._cleanup_client()
             
@@ -101,7 +212,7 @@ class V2XWebSocketBridge:
         logger.debug(f"Looking for sensors attached to vehicle ID: {self.player_vehicle.id}")
         logger.debug(f"Total V2X sensors in registry: {len(v2x_sensors)}")
         
-        for sensor in v2x_sensors:
+        for sensor in tuple(v2x_sensors.values()):
             if (hasattr(sensor, 'attach_to') and sensor.attach_to and 
                 sensor.attach_to.id == self.player_vehicle.id):
                 self.player_sensor = sensor
@@ -112,17 +223,23 @@ class V2XWebSocketBridge:
             logger.error("Could not find player vehicle sensor for WebSocket proxy!")
             return
             
-        self.original_message_handlers = self.player_sensor.message_handlers.copy()
         self.player_sensor.add_message_handler(self._forward_to_websocket)
         logger.info(f"Added WebSocket message handler to sensor {self.player_sensor.sensor_id}")
         
-    async def _handle_incoming_message(self, message: str):
+    async def _handle_incoming_message(self, message: str | bytes):
         """Handle incoming CAM message from WebSocket client"""
+        codec = self._codec
+        try:
+            # JSON and msgpack decode errors both derive from ValueError
+            data = codec.decode(message)
+        except ValueError as e:
+            logger.error(f"Invalid {codec.name} from WebSocket client: {e}")
+            await self._send_error(f"Invalid {codec.name} format")
+            return
+
         try:
-            data = json.loads(message)
-            
             if data.get("type") == "cam":
-                # Convert JSON to CAMData
+                # Convert the decoded payload to CAMData
                 cam_data = CAMData.from_dict(data["payload"])
                 
                 # Set sender_id to match player vehicle if not specified
@@ -138,9 +255,6 @@ class V2XWebSocketBridge:
                 # Respond to ping
                 await self._send_to_websocket({"type": "pong", "timestamp": data.get("timestamp")})
                 
-        except json.JSONDecodeError as e:
-            logger.error(f"Invalid JSON from WebSocket client: {e}")
-            await self._send_error("Invalid JSON format")
         except Exception as e:
             logger.error(f"Error processing WebSocket message: {e}")
             await self._send_error(f"Processing error: {str(e)}")
@@ -151,33 +265,81 @@ class V2XWebSocketBridge:
             logger.debug("No WebSocket client connected, skipping CAM forward")
             return
             
-        logger.debug(f"Forwarding CAM from {cam_data.sender_id} to WebSocket client")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Forwarding CAM from %s to WebSocket client", cam_data.sender_id)
             
         try:
-            message = {
-                "type": "cam",
-                "payload": cam_data.to_dict()
-            }
-            
-            if self.loop and self.loop.is_running():
-                asyncio.run_coroutine_threadsafe(
-                    self._send_to_websocket(message), self.loop
-                )
+            loop = self.loop
+            if loop and loop.is_running():
+                payload = self._codec.cam_payload(cam_data)
+                # Hand the payload to the writer task; no Task or Future per CAM
+                loop.call_soon_threadsafe(self._enqueue_outgoing, payload)
             else:
                 logger.error("Event loop not running, cannot send to WebSocket")
                 
         except Exception as e:
             logger.error(f"Error forwarding message to WebSocket: {e}")
-            import traceback
-            logger.debug(f"Full traceback: {traceback.format_exc()}")
+            logger.debug("Full traceback:", exc_info=True)
             # Clear websocket reference if there's an error
             self.websocket = None
                 
+    def _enqueue_outgoing(self, payload: str | Dict):
+        """Queue a CAM payload for the writer task (runs on the event loop)"""
+        queue = self._out_queue
+        if queue is None:
+            return
+        if len(queue) == queue.maxlen:
+            # The append below evicts the oldest CAM, the most outdated one
+            self.dropped_messages += 1
+            self._warn_dropped()
+        queue.append(payload)
+        self._out_ready.set()
+
+    def _warn_dropped(self):
+        """Warn about dropped CAM messages, at most once per DROP_WARNING_INTERVAL"""
+        now = self.loop.time()
+        if (self._last_drop_warning is not None
+                and now - self._last_drop_warning < self.DROP_WARNING_INTERVAL):
+            return
+        self._last_drop_warning = now
+        logger.warning(f"WebSocket client for {self.challenge_id} is falling behind, "
+                       f"{self.dropped_messages} CAM messages dropped so far")
+
+    async def _writer_loop(self, queue: deque, ready: asyncio.Event):
+        """
+        Write queued CAM messages to the client.
+
+        Messages that piled up while the previous frame was being sent are
+        coalesced into one ``cam_batch`` frame of up to MAX_BATCH_SIZE
+        payloads; a lone message still goes out as a plain ``cam`` frame.
+        JSON payloads are already encoded, so their frames are assembled
+        without running the encoder again.
+
+        Args:
+            queue: Outbound queue of the connection this task serves
+            ready: Event set whenever the queue becomes non-empty
+        """
+        popleft = queue.popleft
+        codec = self._codec
+        while True:
+            await ready.wait()
+            ready.clear()
+            while queue:
+                if len(queue) == 1:
+                    await self._send_frame(codec.cam_frame(popleft()))
+                    continue
+                batch = [popleft() for _ in range(min(len(queue), self.MAX_BATCH_SIZE))]
+                await self._send_frame(codec.cam_batch_frame(batch))
+
     async def _send_to_websocket(self, message: Dict):
         """Send message to WebSocket client"""
+        await self._send_frame(self._codec.encode(message))
+
+    async def _send_frame(self, frame: str | bytes):
+        """Send an encoded frame to the WebSocket client"""
         if self.websocket:
             try:
-                await self.websocket.send(json.dumps(message))
+                await self.websocket.send(frame)
             except Exception as e:
                 logger.error(f"Error sending to WebSocket: {e}")
                 self.websocket = None
@@ -192,13 +354,21 @@ class V2XWebSocketBridge:
     async def _cleanup_client(self):
         """Clean up client connection"""
         self.websocket = None
+
+        if self._writer_task:
+            self._writer_task.cancel()
+            self._writer_task = None
+        self._out_queue = None
+        self._out_ready = None
         
-        # Restore original message handlers
-        if self.player_sensor and self.original_message_handlers:
+        # Stop the player sensor from calling into the bridge while no client
+        # is connected; handlers added by others since connecting are kept
+        if self.player_sensor:
             try:
-                self.player_sensor.message_handlers = self.original_message_handlers
+                self.player_sensor.remove_message_handler(self._forward_to_websocket)
             except Exception as e:
-                logger.error(f"Error restoring message handlers: {e}")
+                logger.error(f"Error removing WebSocket message handler: {e}")
+            self.player_sensor = None
             
         # Remove virtual sensor
         if self.virtual_sensor:
@@ -211,33 +381,37 @@ class V2XWebSocketBridge:
         logger.info("WebSocket client cleaned up")
         
     def stop(self):
-        """Stop the WebSocket server"""
-        if self.loop and self.loop.is_running():
-            if self.server:
-                self.loop.call_soon_threadsafe(self.server.close)
-            self.loop.call_soon_threadsafe(self.loop.stop)
+        """Stop serving this bridge, shutting the server down if the bridge owns it"""
+        if self.server is None:
+            return
             
-        if hasattr(self, 'server_thread') and self.server_thread.is_alive():
-            self.server_thread.join(timeout=5)
+        if self._owns_server:
+            self.server.stop()
+        else:
+            self.server.unregister_bridge(self)
             
-        logger.info("WebSocket server stopped")
+        logger.info(f"WebSocket bridge for {self.challenge_id} stopped")
 
 
 class WebSocketVirtualSensor:
     """Virtual V2X sensor that represents the WebSocket client in the simulation"""
+
+    # Broadcast range of injected CAMs, matching a V2X sensor with the default config
+    MAX_DISTANCE: float = V2XSensorConfig().max_distance
     
     def __init__(self, world: carla.World, player_vehicle: carla.Vehicle, websocket_bridge: V2XWebSocketBridge):
         self.world = world
         self.player_vehicle = player_vehicle
         self.websocket_bridge = websocket_bridge
-        self.sensor_id = f"websocket_client_{player_vehicle.id}"
+        # Challenges can share a hero, so the challenge keeps the ID unique
+        self.sensor_id = f"websocket_client_{websocket_bridge.challenge_id}_{player_vehicle.id}"
         
         # Inherit position from player vehicle
         self.location = None
         self.attach_to = player_vehicle
         
         # Add to global sensor registry
-        v2x_sensors.append(self)
+        register_v2x_node(self)
         logger.info(f"Virtual WebSocket sensor created: {self.sensor_id}")
         
     def inject_cam_message(self, cam_data: CAMData):
@@ -246,46 +420,29 @@ class WebSocketVirtualSensor:
         self._update_location()
         
         # Set sender location to player vehicle location for range calculations
+        cam_data._serialized = None
         if self.location and cam_data.vehicle_data:
             cam_data.vehicle_data["position"] = self.location
         elif self.location:
             cam_data.vehicle_data = {"position": self.location}
             
-        # Broadcast to other sensors using the same logic as regular sensors
-        import math
-        
-        # Use default config values for range calculation
-        max_path_loss = 140  # Default from V2XSensorConfig
-        frequency_loss = 20 * math.log10(5900 * 1000) + 32.44  # 5.9 GHz default
-        max_distance = min(
-            10 ** ((max_path_loss - frequency_loss) / 20) * 1000,
-            1000  # Default filter distance
-        )
-        max_distance = 50
+        if self.location is None:
+            return
         
-        # Broadcast to all other V2X sensors within range
-        for sensor in v2x_sensors:
-            if (sensor.sensor_id != self.sensor_id and 
-                hasattr(sensor, 'location') and sensor.location is not None):
-                
-                distance = math.sqrt(
-                    (self.location.x - sensor.location.x) ** 2 +
-                    (self.location.y - sensor.location.y) ** 2 +
-                    (self.location.z - sensor.location.z) ** 2
-                )
-                
-                if distance <= max_distance:
-                    if hasattr(sensor, 'receive_cam'):
-                        sensor.receive_cam(cam_data)
+        broadcast_cam(self.sensor_id, self.location, self.MAX_DISTANCE, cam_data)
                         
     def _update_location(self):
         """Update location to match player vehicle"""
-        if self.player_vehicle and hasattr(self.player_vehicle, 'get_location'):
-            try:
-                self.location = self.player_vehicle.get_location()
-            except Exception:
-                # Vehicle might be destroyed
-                pass
+        vehicle = self.player_vehicle
+        if vehicle is None or not vehicle.is_alive:
+            # The vehicle was destroyed outside the bridge; leave the broadcast range index
+            if self.location is not None:
+                self.location = None
+                sensor_grid.remove(self)
+            return
+
+        self.location = vehicle.get_location()
+        sensor_grid.update(self)
                 
     def receive_cam(self, cam_data: CAMData):
         """This virtual sensor doesn't receive messages directly (player sensor handles that)"""
@@ -293,6 +450,122 @@ class WebSocketVirtualSensor:
         
     def destroy(self):
         """Remove virtual sensor from global registry"""
-        if self in v2x_sensors:
-            v2x_sensors.remove(self)
+        sensor_grid.remove(self)
+        if v2x_sensors.get(self.sensor_id) is self:
+            del v2x_sensors[self.sensor_id]
         logger.info(f"Virtual WebSocket sensor destroyed: {self.sensor_id}")
+
+
+class V2XWebSocketServer:
+    """
+    Single WebSocket server hosting the bridges of every active challenge.
+
+    Clients select a challenge with the ``/challenge/<challenge_id>`` path.
+    Connections to ``/`` are routed to the only registered bridge, so a
+    lone challenge stays reachable at ``ws://host:port`` as before.
+    """
+
+    PATH_PREFIX = "/challenge/"
+
+    def __init__(self, port: int = 4000, host: str = "localhost"):
+        self.host = host
+        self.port = port
+        self.bridges: Dict[str, V2XWebSocketBridge] = {}
+
+        self.server: Server | None = None
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.server_thread: threading.Thread | None = None
+        self._ready = threading.Event()
+
+    def register_bridge(self, bridge: V2XWebSocketBridge):
+        """Route clients for the bridge's challenge to it"""
+        self.bridges[bridge.challenge_id] = bridge
+        bridge.server = self
+        logger.info(f"WebSocket bridge registered on ws://{self.host}:{self.port}{self.PATH_PREFIX}{bridge.challenge_id}")
+
+    def unregister_bridge(self, bridge: V2XWebSocketBridge):
+        """Stop routing to a bridge and close its client connection, if any"""
+        if self.bridges.get(bridge.challenge_id) is not bridge:
+            return
+        del self.bridges[bridge.challenge_id]
+
+        if bridge.websocket and self.loop and self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(
+                bridge.websocket.close(code=1001, reason="Challenge stopped"), self.loop
+            )
+        logger.info(f"WebSocket bridge unregistered: {bridge.challenge_id}")
+
+    def _resolve_bridge(self, path: str) -> V2XWebSocketBridge | None:
+        """Find the bridge a request path refers to"""
+        if path.startswith(self.PATH_PREFIX):
+            return self.bridges.get(path[len(self.PATH_PREFIX):].strip("/"))
+        if path in ("", "/") and len(self.bridges) == 1:
+            return next(iter(self.bridges.values()))
+        return None
+
+    async def _handle_connection(self, websocket: ServerConnection):
+        """Dispatch a new connection to the bridge of the requested challenge"""
+        path = websocket.request.path
+        bridge = self._resolve_bridge(path)
+        if bridge is None:
+            logger.warning(f"WebSocket client requested unknown challenge path: {path}")
+            await websocket.close(code=1008, reason="Unknown challenge")
+            return
+        await bridge.handle_client(websocket, path)
+
+    async def serve(self):
+        """Start the WebSocket server and serve until it is closed"""
+        logger.info(f"Starting WebSocket server on port {self.port}")
+        self.loop = asyncio.get_running_loop()
+        try:
+            async with serve(
+                self._handle_connection,
+                self.host,
+                self.port,
+                subprotocols=[MSGPACK_SUBPROTOCOL] if msgpack else None,
+                # Clients offering no subprotocol are accepted and get JSON frames
+                select_subprotocol=_select_subprotocol if msgpack else None,
+                # CAM frames repeat the same keys, so they deflate well
+                compression="deflate",
+                max_size=1024*1024,  # 1MB max message size
+                ping_interval=20,
+                ping_timeout=10
+            ) as server:
+                self.server = server
+                self._ready.set()
+                logger.info(f"WebSocket server started on ws://{self.host}:{self.port}")
+                await server.wait_closed()
+        except Exception as e:
+            logger.error(f"Failed to start WebSocket server: {e}")
+        finally:
+            self._ready.set()
+
+    def start(self, timeout: float = 5.0) -> bool:
+        """
+        Start the WebSocket server in a separate thread.
+
+        Args:
+            timeout: How long to wait for the server to start listening (seconds)
+
+        Returns:
+            bool: True if the server is listening, False otherwise
+        """
+        def run_server():
+            asyncio.run(self.serve(), loop_factory=_new_event_loop)
+
+        self._ready.clear()
+        self.server_thread = threading.Thread(target=run_server, daemon=True)
+        self.server_thread.start()
+        self._ready.wait(timeout)
+        return self.server is not None
+
+    def stop(self):
+        """Stop the WebSocket server"""
+        if self.loop and self.loop.is_running() and self.server:
+            # Closing the server ends serve(), which lets asyncio.run() return
+            self.loop.call_soon_threadsafe(self.server.close)
+
+        if self.server_thread and self.server_thread.is_alive():
+            self.server_thread.join(timeout=5)
+
+        logger.info("WebSocket server stopped")
@@ -7,6 +7,54 @@ import carla
 
 logger = logging.getLogger(__name__)
 
+# Vehicles found or spawned by role name, keyed by (world episode id, role name)
+_vehicle_cache: dict[tuple[int, str], carla.Vehicle] = {}
+
+# (simulation frame, vehicles by role name) of the last actor scan per world episode id
+_frame_vehicles: dict[int, tuple[int, dict[str, carla.Vehicle]]] = {}
+
+
+# Vehicle blueprints chosen by deploy functions, keyed by (world episode id, preferred id substring)
+_blueprint_cache: dict[tuple[int, str], carla.ActorBlueprint] = {}
+
+# Map spawn points per world episode id; a map reload starts a new episode
+_spawn_points_cache: dict[int, list[carla.Transform]] = {}
+
+
+def _get_spawn_points(world: carla.World) -> list[carla.Transform]:
+    """Get the map's spawn points, fetching them once per loaded world"""
+    spawn_points = _spawn_points_cache.get(world.id)
+    if spawn_points is None:
+        spawn_points = world.get_map().get_spawn_points()
+        _spawn_points_cache[world.id] = spawn_points
+    return spawn_points
+
+
+def _get_frame_vehicles(world: carla.World, rescan: bool = False) -> tuple[dict[str, carla.Vehicle], bool]:
+    """
+    Index the world's vehicles by role name, scanning the actors at most once per simulation frame.
+
+    Args:
+        world: The CARLA world instance
+        rescan: Scan again even if this frame was already indexed
+
+    Returns:
+        tuple: The vehicles by role name, and whether they were scanned by
+        this call rather than taken from the frame's index
+    """
+    frame = world.get_snapshot().frame
+    cached = _frame_vehicles.get(world.id)
+    if not rescan and cached is not None and cached[0] == frame:
+        return cached[1], False
+
+    vehicles: dict[str, carla.Vehicle] = {}
+    # Filtering by type id on the actor list leaves only vehicles to iterate in Python
+    for actor in world.get_actors().filter("vehicle.*"):
+        # Keep the first vehicle found for each role, as the linear scan did
+        vehicles.setdefault(actor.attributes.get("role_name", ""), actor)
+    _frame_vehicles[world.id] = (frame, vehicles)
+    return vehicles, True
+
 
 def get_player_vehicle(world: carla.World) -> carla.Vehicle | None:
     """Get the player vehicle from the world"""
@@ -14,13 +62,7 @@ def get_player_vehicle(world: carla.World) -> carla.Vehicle | None:
         logger.warning("World not set, cannot find player vehicle")
         return None
 
-    actors = world.get_actors()
-    for actor in actors:
-        if actor.type_id.startswith("vehicle.") and hasattr(actor, "attributes"):
-            role_name = actor.attributes.get("role_name", "")
-            if role_name == "hero":
-                return actor
-    return None
+    return get_vehicle(world, "hero")
 
 
 def get_vehicle(world: carla.World, role_name: str) -> carla.Vehicle | None:
@@ -29,16 +71,71 @@ def get_vehicle(world: carla.World, role_name: str) -> carla.Vehicle | None:
         logger.warning("World not set, cannot find vehicle")
         return None
 
-    actors = world.get_actors()
-    for actor in actors:
-        if actor.type_id.startswith("vehicle.") and hasattr(actor, "attributes"):
-            if actor.attributes.get("role_name", "") == role_name:
-                return actor
-    return None
+    # Reuse the last match while it is still alive, instead of scanning every actor
+    key = (world.id, role_name)
+    cached = _vehicle_cache.get(key)
+    if cached is not None:
+        if cached.is_alive:
+            return cached
+        del _vehicle_cache[key]
+
+    vehicles, scanned = _get_frame_vehicles(world)
+    vehicle = vehicles.get(role_name)
+    if not scanned and (vehicle is None or not vehicle.is_alive):
+        # Spawned or destroyed since this frame was indexed (e.g. before the
+        # next tick in synchronous mode), so the index is stale: rescan once
+        vehicle = _get_frame_vehicles(world, rescan=True)[0].get(role_name)
+    if vehicle is not None and not vehicle.is_alive:
+        vehicle = None
+    if vehicle is not None:
+        _vehicle_cache[key] = vehicle
+    return vehicle
+
+
+def _select_blueprint(world: carla.World, prefer_blueprint: str) -> carla.ActorBlueprint | None:
+    """
+    Choose the vehicle blueprint to spawn, searching the blueprint library once per world.
+
+    Args:
+        world: The CARLA world instance
+        prefer_blueprint: Substring of the preferred blueprint id (e.g. "charger")
+
+    Returns:
+        carla.ActorBlueprint: The first matching vehicle blueprint, else the
+        first vehicle blueprint, or None if the library has no vehicles
+    """
+    prefer_blueprint = prefer_blueprint.lower()
+    key = (world.id, prefer_blueprint)
+    blueprint = _blueprint_cache.get(key)
+    if blueprint is not None:
+        return blueprint
+
+    library = world.get_blueprint_library()
+    preferred = library.filter(f"vehicle.*{prefer_blueprint}*")
+    if preferred:
+        blueprint = preferred[0]
+        logger.info(f"Selected preferred vehicle blueprint: {blueprint.id}")
+    else:
+        vehicles = library.filter("vehicle.*")
+        if not vehicles:
+            return None
+        logger.warning(f"No '{prefer_blueprint}' vehicle blueprint found, using fallback vehicle")
+        blueprint = vehicles[0]
+
+    _blueprint_cache[key] = blueprint
+    return blueprint
 
 
-def deploy_vehicle_at_location(world: carla.World, role_name: str, transform: carla.Transform, spawned_actors: list[carla.Vehicle]) -> carla.Vehicle:
+def deploy_vehicle_at_location(
+    world: carla.World,
+    role_name: str,
+    transform: carla.Transform,
+    spawned_actors: list[carla.Vehicle] | None = None,
+    prefer_blueprint: str = "charger",
+) -> carla.Vehicle | None:
     """Deploy a vehicle at a specific location"""
+    if spawned_actors is None:
+        spawned_actors = []
     try:
         # Check if vehicle already exists
         existing_vehicle = get_vehicle(world, role_name)
@@ -47,23 +144,11 @@ def deploy_vehicle_at_location(world: carla.World, role_name: str, transform: ca
             spawned_actors.append(existing_vehicle)
             return existing_vehicle
         
-        # Get vehicle blueprint
-        vehicles = world.get_blueprint_library().filter("vehicle.*")
-        if not vehicles:
+        blueprint = _select_blueprint(world, prefer_blueprint)
+        if not blueprint:
             logger.error("No vehicle blueprints found")
             return None
         
-        # Choose a suitable vehicle blueprint (always prefer Dodge Charger)
-        blueprint = None
-        for bp in vehicles:
-            if "charger" in bp.id.lower():
-                blueprint = bp
-                logger.info(f"Selected Dodge Charger: {bp.id}")
-                break
-        if not blueprint:
-            logger.warning("Dodge Charger not found, using fallback vehicle")
-            blueprint = vehicles[0]  # Fallback
-        
         blueprint.set_attribute("role_name", role_name)
         
         # Try to spawn at the specified location
@@ -88,6 +173,8 @@ def deploy_vehicle_at_location(world: carla.World, role_name: str, transform: ca
             return None
         
         logger.info(f"Deployed {role_name} vehicle: {vehicle.type_id} at {vehicle.get_transform().location}")
+        # The frame's vehicle index predates this vehicle, so record it directly
+        _vehicle_cache[(world.id, role_name)] = vehicle
         spawned_actors.append(vehicle)
         return vehicle
         
@@ -99,14 +186,30 @@ def deploy_vehicle(
     world: carla.World,
     role_name: str,
     autopilot: bool,
-    spawned_actors: list[carla.Vehicle],
+    spawned_actors: list[carla.Vehicle] | None = None,
+    prefer_blueprint: str = "charger",
 ) -> carla.Vehicle | None:
-    """Deploy a vehicle with the specified role name in the world"""
+    """
+    Deploy a vehicle with the specified role name in the world.
+
+    Args:
+        world: The CARLA world instance
+        role_name: Role name given to the vehicle (e.g. "hero")
+        autopilot: Whether to hand the vehicle to the traffic manager
+        spawned_actors: List the deployed vehicle is appended to, if given
+        prefer_blueprint: Substring of the preferred blueprint id
+
+    Returns:
+        carla.Vehicle: The deployed or already existing vehicle, or None
+    """
 
     if not world:
         logger.warning("World not set, cannot deploy vehicle")
         return None
 
+    if spawned_actors is None:
+        spawned_actors = []
+
     # Check if the vehicle already exists
     existing_vehicle = get_vehicle(world, role_name)
     if existing_vehicle:
@@ -118,45 +221,32 @@ def deploy_vehicle(
 
     logger.info(f"Deploying vehicle with role name: {role_name}")
 
-    # Get available vehicle blueprints
-    vehicles = world.get_blueprint_library().filter("vehicle.*")
-    if not vehicles:
+    blueprint = _select_blueprint(world, prefer_blueprint)
+    if not blueprint:
         logger.warning("No vehicle blueprints found")
         return None
 
-    # Choose a suitable vehicle blueprint (always prefer Dodge Charger)
-    blueprint = None
-    for bp in vehicles:
-        if "charger" in bp.id.lower():
-            blueprint = bp
-            logger.info(f"Selected Dodge Charger: {bp.id}")
-            break
-
-    if not blueprint:
-        logger.warning("Dodge Charger not found, using fallback vehicle")
-        blueprint = vehicles[0]  # Fallback to first available
-
     logger.debug(f"Using vehicle blueprint: {blueprint.id}")
     blueprint.set_attribute("role_name", role_name)
 
-    spawn_points = world.get_map().get_spawn_points()
+    spawn_points = _get_spawn_points(world)
 
-    # Try multiple spawn points to avoid collisions
+    # Try distinct spawn points to avoid collisions; try_spawn_actor reports
+    # an occupied point by returning None instead of raising
     vehicle = None
     max_attempts = 15
+    candidates = random.sample(spawn_points, min(max_attempts, len(spawn_points)))
 
-    for attempt in range(max_attempts):
-        try:
-            spawn_point = random.choice(spawn_points)
-            vehicle = world.spawn_actor(blueprint, spawn_point)
+    for spawn_point in candidates:
+        vehicle = world.try_spawn_actor(blueprint, spawn_point)
+        if vehicle is not None:
             break
-        except RuntimeError as e:
-            if attempt == max_attempts - 1:
-                logger.error(
-                    f"Failed to spawn vehicle {role_name} after {max_attempts} attempts"
-                )
-                raise e
-            continue
+
+    if vehicle is None:
+        logger.error(
+            f"Failed to spawn vehicle {role_name} after {len(candidates)} attempts"
+        )
+        raise RuntimeError(f"No free spawn point found for vehicle {role_name}")
 
     # Set autopilot if required
     if autopilot:
@@ -166,5 +256,7 @@ def deploy_vehicle(
     logger.info(
         f"Deployed {role_name} vehicle: {vehicle.type_id} at {vehicle.get_transform().location}"
     )
+    # The frame's vehicle index predates this vehicle, so record it directly
+    _vehicle_cache[(world.id, role_name)] = vehicle
     spawned_actors.append(vehicle)
     return vehicle
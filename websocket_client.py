@@ -8,11 +8,12 @@ This script connects to the WebSocket server and demonstrates:
 3. Basic ping/pong functionality
 
 Usage:
-    python websocket_client.py [--host HOST] [--port PORT]
+    python websocket_client.py [--host HOST] [--port PORT] [--challenge ID]
     
 Examples:
     python websocket_client.py --host 192.168.1.100 --port 8080
     python websocket_client.py --host localhost --port 4000
+    python websocket_client.py --host localhost --port 4000 --challenge my_challenge
 """
 
 import argparse
@@ -22,25 +23,69 @@ import logging
 import websockets
 from datetime import datetime
 
+try:
+    import orjson
+
+    def _dumps(obj):
+        return orjson.dumps(obj).decode()
+
+    _loads = orjson.loads
+except ImportError:
+    _dumps = json.dumps
+    _loads = json.loads
+
+try:
+    import uvloop
+    _new_event_loop = uvloop.new_event_loop
+except ImportError:
+    _new_event_loop = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Subprotocol under which the server exchanges msgpack binary frames
+MSGPACK_SUBPROTOCOL = "v2x.msgpack"
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 class V2XWebSocketClient:
-    def __init__(self, host="localhost", port=4000):
+    def __init__(self, host="localhost", port=4000, challenge_id=None):
         self.uri = f"ws://{host}:{port}"
+        if challenge_id:
+            self.uri += f"/challenge/{challenge_id}"
         self.websocket = None
+        self.use_msgpack = False
         
     async def connect(self):
         """Connect to the WebSocket server"""
         try:
-            self.websocket = await websockets.connect(self.uri)
-            logger.info(f"Connected to {self.uri}")
+            self.websocket = await websockets.connect(
+                self.uri,
+                subprotocols=[MSGPACK_SUBPROTOCOL] if msgpack else None
+            )
+            self.use_msgpack = self.websocket.subprotocol == MSGPACK_SUBPROTOCOL
+            logger.info(f"Connected to {self.uri} ({'msgpack' if self.use_msgpack else 'JSON'} frames)")
             return True
         except Exception as e:
             logger.error(f"Failed to connect: {e}")
             return False
     
+    def _encode(self, message):
+        """Encode a message in the negotiated wire format"""
+        if self.use_msgpack:
+            return msgpack.packb(message, use_bin_type=True)
+        return _dumps(message)
+
+    def _decode(self, frame):
+        """Decode a frame in the negotiated wire format"""
+        if self.use_msgpack and isinstance(frame, bytes):
+            return msgpack.unpackb(frame, raw=False)
+        return _loads(frame)
+
     async def send_cam_message(self, sender_id="websocket_client", speed=25.0, heading=90.0):
         """Send a test CAM message"""
         if not self.websocket:
@@ -73,7 +118,7 @@ class V2XWebSocketClient:
         }
         
         try:
-            await self.websocket.send(json.dumps(cam_message))
+            await self.websocket.send(self._encode(cam_message))
             logger.info(f"Sent CAM message: {sender_id} at {speed:.1f} m/s, {heading}°")
         except Exception as e:
             logger.error(f"Failed to send CAM message: {e}")
@@ -90,7 +135,7 @@ class V2XWebSocketClient:
         }
         
         try:
-            await self.websocket.send(json.dumps(ping_message))
+            await self.websocket.send(self._encode(ping_message))
             logger.info("Sent ping")
         except Exception as e:
             logger.error(f"Failed to send ping: {e}")
@@ -104,12 +149,16 @@ class V2XWebSocketClient:
         try:
             async for message in self.websocket:
                 try:
-                    data = json.loads(message)
+                    data = self._decode(message)
                     msg_type = data.get("type")
                     
                     if msg_type == "cam":
                         payload = data["payload"]
                         logger.info(f"Received CAM: {payload}")
+                    elif msg_type == "cam_batch":
+                        # Several CAMs coalesced into one frame by the server
+                        for payload in data["payload"]:
+                            logger.info(f"Received CAM: {payload}")
                     elif msg_type == "pong":
                         logger.info("Received pong")
                         
@@ -119,8 +168,9 @@ class V2XWebSocketClient:
                     else:
                         logger.info(f"Received message: {data}")
                         
-                except json.JSONDecodeError as e:
-                    logger.error(f"Invalid JSON received: {e}")
+                except ValueError as e:
+                    # JSON and msgpack decode errors both derive from ValueError
+                    logger.error(f"Invalid message received: {e}")
                     
         except websockets.exceptions.ConnectionClosed:
             logger.info("Connection closed")
@@ -134,8 +184,8 @@ class V2XWebSocketClient:
             logger.info("Disconnected")
 
 
-async def main(host, port):
-    client = V2XWebSocketClient(host=host, port=port)
+async def main(host, port, challenge_id=None):
+    client = V2XWebSocketClient(host=host, port=port, challenge_id=challenge_id)
     
     if not await client.connect():
         return
@@ -189,8 +239,14 @@ if __name__ == "__main__":
         default=4000,
         help='WebSocket server port (default: 4000)'
     )
+    parser.add_argument(
+        '--challenge',
+        type=str,
+        default=None,
+        help='Challenge ID to connect to when several challenges are running'
+    )
     
     args = parser.parse_args()
     
     logger.info(f"Connecting to ws://{args.host}:{args.port}")
-    asyncio.run(main(args.host, args.port))
+    asyncio.run(main(args.host, args.port, args.challenge), loop_factory=_new_event_loop)